@@ -1,41 +1,218 @@
 import json
 import os
 import subprocess
-import re
 import sys
 import argparse
-import time  # Added for retries
-import importlib
-import pkgutil
+import asyncio
+import atexit
+import contextvars
+import copy
+import functools
+import hashlib
 import inspect
+import email.utils
+import tempfile
+import time  # Added for retries
 import yaml  # Added for config file
 import logging  # Added for logging
+import logging.handlers
+import queue
+import random
+import threading
 import uuid  # Added for trace IDs
-from typing import Dict, Any, List, Optional, Iterable, Tuple, MutableMapping
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Any,
+    FrozenSet,
+    List,
+    Optional,
+    Iterable,
+    Tuple,
+)
 
 from backup_utils import restore_backups
 
-from google.cloud import aiplatform
-from vertexai.generative_models import GenerativeModel, Part  # type: ignore
-from google.cloud.aiplatform_v1beta1.types import GenerateContentResponse
-import vertexai  # type: ignore
-from google.api_core import (
-    exceptions as google_api_exceptions,
-)  # Added for specific API error handling
-
-from tools.base_tool import BaseTool
+try:  # Prefer the libyaml-backed loader, it is several times faster.
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader  # type: ignore
+
+if TYPE_CHECKING:
+    import vertexai  # type: ignore
+    from vertexai.generative_models import GenerativeModel, Part  # type: ignore
+    from google.cloud.aiplatform_v1beta1.types import GenerateContentResponse
+    from google.api_core import exceptions as google_api_exceptions
+else:
+    # The Vertex AI SDK takes hundreds of milliseconds to import, so it is only
+    # loaded once an agent is created (see _ensure_vertex_imported).
+    vertexai = None
+    GenerativeModel = Part = None
+    google_api_exceptions = None
+
+from tools import BaseTool, Confirmer, confirm_with_input, import_all_tools
 
 DEFAULT_CONFIG_PATH = "config.yaml"
 
+_TOOL_CALL_OPEN = "<tool_call>"
+_TOOL_CALL_CLOSE = "</tool_call>"
+_JSON_DECODER = json.JSONDecoder()
+
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # orjson is optional; fall back to the stdlib encoder.
+    orjson = None
+
+
+def _json_dumps(obj: Any, pretty: bool = False) -> str:
+    """
+    Serializes obj to JSON, using orjson when it is installed.
+
+    Args:
+        obj: The object to serialize.
+        pretty: Indent by two spaces instead of emitting compact JSON.
+
+    Returns:
+        The JSON text.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+    if pretty:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(",", ":"))
+
+
+class _LazyJSON:
+    """Log argument that serializes its object only when the message is formatted."""
+
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj: Any):
+        self._obj = obj
+
+    def __str__(self) -> str:
+        return _json_dumps(self._obj)
+
+
+def _json_loads_tool_call(body: str) -> Any:
+    """
+    Parses the JSON body of a <tool_call> block.
+
+    orjson is tried first when installed; anything it rejects (such as text
+    trailing the JSON value) falls back to the stdlib decoder's raw_decode.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return _JSON_DECODER.raw_decode(body)[0]
+
+
+def _function_calls_in_chunk(chunk: Any) -> List[Dict[str, Any]]:
+    """
+    Returns the native function_call parts of a streamed chunk as tool calls.
+
+    Each call is converted to the ``{"tool": ..., "parameters": ...}`` form
+    used by <tool_call> blocks.
+    """
+    candidates = getattr(chunk, "candidates", None)
+    if not candidates:
+        return []
+    content = getattr(candidates[0], "content", None)
+    tool_calls = []
+    for part in getattr(content, "parts", None) or ():
+        function_call = getattr(part, "function_call", None)
+        name = getattr(function_call, "name", None)
+        if name:
+            args = getattr(function_call, "args", None)
+            tool_calls.append({"tool": name, "parameters": dict(args) if args else {}})
+    return tool_calls
+
+
+# Keyword arguments the agent passes to every tool's execute().
+_FRAMEWORK_KWARGS: FrozenSet[str] = frozenset(
+    ("agent_safe_mode", "trace_id", "config", "confirm")
+)
+
+
+def _accepted_framework_kwargs(execute: Callable[..., Any]) -> FrozenSet[str]:
+    """Returns the framework keyword arguments a tool's execute() can take."""
+    try:
+        parameters = inspect.signature(execute).parameters.values()
+    except (TypeError, ValueError):
+        return _FRAMEWORK_KWARGS
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return _FRAMEWORK_KWARGS
+    return _FRAMEWORK_KWARGS.intersection(p.name for p in parameters)
+
+
+# (project_id, location) that vertexai.init() was last called with.
+_VERTEX_INIT_KEY: Optional[Tuple[str, str]] = None
+# GenerativeModel instances keyed on (project_id, location, model_name).
+_MODEL_CACHE: Dict[Tuple[str, str, str], "GenerativeModel"] = {}
+
+
+def _ensure_vertex_imported() -> None:
+    """Imports the Vertex AI SDK into the module namespace on first use."""
+    global vertexai, GenerativeModel, Part, google_api_exceptions
+    if vertexai is not None:
+        return
+    import vertexai as _vertexai  # type: ignore
+    from vertexai.generative_models import (  # type: ignore
+        GenerativeModel as _GenerativeModel,
+        Part as _Part,
+    )
+    from google.api_core import exceptions as _google_api_exceptions
+
+    GenerativeModel = _GenerativeModel
+    Part = _Part
+    google_api_exceptions = _google_api_exceptions
+    vertexai = _vertexai
+
+
+def _config_cache_path(config_path: str) -> str:
+    """Returns the path of the JSON sidecar used to cache a parsed config."""
+    return config_path + ".cache.json"
+
+
+def _write_config_cache(cache_path: str, config: Dict[str, Any]) -> None:
+    """Atomically writes ``config`` to the JSON sidecar, ignoring failures."""
+    try:
+        serialized = json.dumps(config)
+        # YAML can express things JSON cannot (non-string keys, dates, ...).
+        # Only cache configs that survive the round trip unchanged.
+        if json.loads(serialized) != config:
+            return
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(cache_path) or ".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(serialized)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except (OSError, TypeError, ValueError):
+        pass  # The cache is an optimization only.
+
 
 def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
-    """Loads configuration from a YAML file."""
+    """Loads configuration from a YAML file.
+
+    The parsed result is cached in a ``<config_path>.cache.json`` sidecar. The
+    sidecar is used instead of re-parsing the YAML as long as it is at least
+    as new as the YAML file. Within a process, configs are also memoized by
+    real path and modification time; callers get their own copy.
+    """
     try:
-        with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
-        if config is None:  # Handle empty config file
-            return {}
-        return config
+        config_mtime = os.stat(config_path).st_mtime_ns
+        config = _load_config_file(os.path.realpath(config_path), config_mtime)
     except FileNotFoundError:
         print(
             f"Warning: Configuration file '{config_path}' not found. Using default values."
@@ -44,23 +221,165 @@ def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
     except yaml.YAMLError as e:
         print(f"Error parsing configuration file '{config_path}': {e}")
         return {}  # Or raise an error, or return a default config structure
+    return copy.deepcopy(config)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_file(config_path: str, config_mtime: int) -> Dict[str, Any]:
+    """Parses a config file, preferring an up-to-date JSON sidecar.
+
+    ``config_mtime`` is only part of the cache key, so an edited file is
+    parsed again. The result is shared and must not be mutated.
+    """
+    cache_path = _config_cache_path(config_path)
+    try:
+        if os.stat(cache_path).st_mtime_ns >= config_mtime:
+            with open(cache_path, "rb") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass  # Missing or unreadable cache, fall back to the YAML file.
+
+    with open(config_path, "r") as f:
+        config = yaml.load(f, Loader=_SafeLoader)
+    if config is None:  # Handle empty config file
+        return {}
+    _write_config_cache(cache_path, config)
+    return config
+
+
+class _StreamEcho:
+    """
+    Echoes streamed model output straight to the stdout file descriptor.
+
+    Encoded chunks are collected in a bytearray and handed to os.write() when
+    a chunk contains a newline or once ``buffer_size`` bytes are pending,
+    bypassing the TextIOWrapper/BufferedWriter layers of sys.stdout.
+    """
+
+    def __init__(self, buffer_size: int = 4096):
+        # Anything already written through sys.stdout must come out first.
+        sys.stdout.flush()
+        self._encoding = sys.stdout.encoding or "utf-8"
+        self._buffer_size = buffer_size
+        self._pending = bytearray()
+        try:
+            self._fd: Optional[int] = sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            # stdout is not backed by a file descriptor (e.g. when captured).
+            self._fd = None
+
+    def write(self, text: str) -> None:
+        if self._fd is None:
+            sys.stdout.write(text)
+            if "\n" in text:
+                sys.stdout.flush()
+            return
+        self._pending += text.encode(self._encoding, errors="replace")
+        if "\n" in text or len(self._pending) >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._fd is None:
+            sys.stdout.flush()
+            return
+        view = memoryview(self._pending)
+        try:
+            while view:
+                # os.write may write fewer bytes than asked (e.g. to a pipe).
+                view = view[os.write(self._fd, view) :]
+        finally:
+            view.release()
+            self._pending.clear()
+
 
+# Trace ID of the task currently executing in this context.
+TRACE_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "trace_id", default=None
+)
+# Whether streamed model output is echoed to stdout; batch tasks turn it off
+# so concurrent tasks do not interleave their output.
+ECHO_STREAM: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "echo_stream", default=True
+)
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamps each log record with the current task's trace ID."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = TRACE_ID.get() or "-"
+        return True
+
+
+def _backoff_delay(base_delay: float, attempt: int) -> float:
+    """Exponential backoff with equal jitter: between half and all of base * 2**attempt."""
+    return random.uniform(0.5, 1.0) * base_delay * (2**attempt)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Extracts the server's suggested retry delay from an API error, if it sent one.
+
+    Checks the HTTP Retry-After header first, then any google.rpc.RetryInfo
+    entries in the error details.
+
+    Args:
+        error: The exception raised by the API call.
+
+    Returns:
+        The delay in seconds, or None if the server gave no hint.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = email.utils.parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+    details = getattr(error, "details", None)
+    if callable(details):
+        try:
+            details = details()
+        except Exception:
+            details = None
+    for detail in details or ():
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return max(
+                0.0,
+                getattr(retry_delay, "seconds", 0)
+                + getattr(retry_delay, "nanos", 0) / 1e9,
+            )
+    return None
 
-# Custom LoggerAdapter to inject trace_id
-class TraceIdAdapter(logging.LoggerAdapter):
-    def process(
-        self, msg: str, kwargs: MutableMapping[str, Any]
-    ) -> Tuple[str, MutableMapping[str, Any]]:
-        if "trace_id" not in self.extra:
-            self.extra["trace_id"] = None  # Default if not set
-        # Ensure trace_id from extra is preferred if not explicitly passed in kwargs
-        # kwargs.setdefault('extra', {}) # Ensure 'extra' key exists in kwargs
-        # if 'trace_id' not in kwargs['extra']: # type: ignore
-        #    kwargs['extra']['trace_id'] = self.extra.get('trace_id') # type: ignore
 
-        # The default LoggerAdapter.process will handle merging 'extra' from kwargs
-        # with self.extra. We just need to ensure our self.extra['trace_id'] is available.
-        return msg, kwargs
+_LOG_LISTENER: Optional[logging.handlers.QueueListener] = None
+# Settings of the current logging setup, see setup_logging.
+_LOGGING_KEY: Optional[Tuple[Any, ...]] = None
+
+
+def _stop_log_listener() -> None:
+    """
+    Stops the logging queue listener, writing out any queued records, and
+    closes the handlers it owns (stop() leaves their files open).
+    """
+    global _LOG_LISTENER, _LOGGING_KEY
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        for handler in _LOG_LISTENER.handlers:
+            handler.close()
+        _LOG_LISTENER = None
+    _LOGGING_KEY = None
+
+
+atexit.register(_stop_log_listener)
 
 
 def setup_logging(config: Dict[str, Any], verbose_cli: bool = False):
@@ -78,13 +397,30 @@ def setup_logging(config: Dict[str, Any], verbose_cli: bool = False):
     log_to_file = log_config.get("log_to_file", False)
     log_file_path = log_config.get("log_file_path", "agent.log")
 
+    # Reconfiguring with identical settings would only replace the handlers
+    # with equivalent ones, so keep the running setup.
+    global _LOGGING_KEY, _LOG_LISTENER
+    logging_key = (
+        log_level,
+        log_to_file,
+        log_file_path,
+        log_config.get("file_log_level", "DEBUG").upper(),
+    )
+    if logging_key == _LOGGING_KEY:
+        return
+
     # Formatter with trace_id
     log_format = "%(asctime)s - %(levelname)s - %(name)s - [%(trace_id)s] - %(message)s"
     formatter = logging.Formatter(log_format)
 
     # Remove all handlers associated with the root logger object.
-    for handler in logging.root.handlers[:]:
-        logging.root.removeHandler(handler)
+    for handler in logging.root.handlers:
+        try:
+            handler.close()
+        except Exception:
+            pass
+    logging.root.handlers.clear()
+    _stop_log_listener()
 
     # Configure root logger
     logging.getLogger().setLevel(
@@ -95,8 +431,16 @@ def setup_logging(config: Dict[str, Any], verbose_cli: bool = False):
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     console_handler.setLevel(log_level)  # Level determined by verbose_cli or config
+    # The trace ID lives in a context variable, so it has to be captured on
+    # the logging thread.
+    console_handler.addFilter(TraceIdFilter())
+    # The console handler stays synchronous: streamed model output, the
+    # interactive menu and input() write to stdout on this thread, and
+    # console records must land in order with them.
     logging.getLogger().addHandler(console_handler)
 
+    file_handler_level_name = None
+    file_handler_error = None
     if log_to_file:
         try:
             log_dir = os.path.dirname(log_file_path)
@@ -111,16 +455,56 @@ def setup_logging(config: Dict[str, Any], verbose_cli: bool = False):
                 logging, file_handler_level_name, logging.DEBUG
             )
             file_handler.setLevel(file_handler_level)
-
-            logging.getLogger().addHandler(file_handler)
-            # Use a basic logger here as our adapter isn't set up globally yet
-            logging.info(
-                f"Logging to file: {log_file_path} at level {file_handler_level_name}"
-            )
         except Exception as e:
-            logging.error(
-                f"Failed to set up file logger at {log_file_path}: {e}", exc_info=True
+            file_handler_error = e
+        else:
+            # The file handler runs on a background thread fed by a queue, so
+            # logging calls only enqueue the record instead of waiting for
+            # the disk write.
+            log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+            _LOG_LISTENER = logging.handlers.QueueListener(
+                log_queue, file_handler, respect_handler_level=True
             )
+            _LOG_LISTENER.start()
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            queue_handler.addFilter(TraceIdFilter())
+            logging.getLogger().addHandler(queue_handler)
+    _LOGGING_KEY = logging_key
+
+    if file_handler_level_name is not None:
+        # Use a basic logger here as our adapter isn't set up globally yet
+        logging.info(
+            f"Logging to file: {log_file_path} at level {file_handler_level_name}"
+        )
+    elif file_handler_error is not None:
+        logging.error(
+            f"Failed to set up file logger at {log_file_path}: {file_handler_error}",
+            exc_info=file_handler_error,
+        )
+
+
+# Options shown by the interactive prompt, rendered once.
+_PROMPT_MENU = "\n".join(
+    [
+        "",
+        "The agent may need more steps or different guidance to complete the task.",
+        "",
+        "Options:",
+        "  [C]ontinue       - Continue for more iterations",
+        "  [F]eedback       - Provide feedback to the agent",
+        "  [R]eview History - Display conversation history",
+        "  [S]top Task      - Stop the current task",
+        "  [V]erbose Toggle - Toggle verbose logging (DEBUG/INFO)",
+        "",
+    ]
+)
+# Response prefixes of model calls that failed for good.
+_TERMINAL_ERROR_PREFIXES = ("Error", "Stream error", "Unexpected stream error")
+_CHOICE_CONTINUE = frozenset({"c", "continue"})
+_CHOICE_FEEDBACK = frozenset({"f", "feedback"})
+_CHOICE_REVIEW = frozenset({"r", "review", "review history"})
+_CHOICE_STOP = frozenset({"s", "stop", "stop task"})
+_CHOICE_VERBOSE = frozenset({"v", "verbose", "verbose toggle"})
 
 
 class VertexAIAgent:
@@ -132,6 +516,7 @@ class VertexAIAgent:
         api_retry_config: Dict[str, Any],
         safe_mode: bool,
         config: Dict[str, Any],
+        confirm: Optional[Confirmer] = None,
     ):
         """
         Initialize the Vertex AI Agent with custom tool calling capabilities.
@@ -143,10 +528,15 @@ class VertexAIAgent:
             api_retry_config: Dictionary with API retry parameters
             safe_mode: Boolean indicating if safe mode is enabled
             config: The loaded application configuration
+            confirm: Asks the user to approve safe-mode actions; defaults to
+                prompting on stdin. Pass a policy function for non-interactive use.
         """
         # Initialize logger first
-        # The 'extra' dict will be used to store trace_id per task
-        self.logger = TraceIdAdapter(logging.getLogger(__name__), {"trace_id": None})
+        # Per-task trace IDs come from the TRACE_ID context variable.
+        self.logger = logging.getLogger(__name__)
+        # Checked before building expensive debug messages; the verbose toggle
+        # in the interactive prompt keeps it up to date.
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
         self.config = config  # Store the config
 
         self.project_id = project_id
@@ -154,72 +544,119 @@ class VertexAIAgent:
         self.model_name = model_name
         self.api_retry_config = api_retry_config
         self.safe_mode = safe_mode
+        self.confirm = confirm or confirm_with_input
 
-        # Initialize Vertex AI
-        # vertexai.init(project=project_id, location=location) # This might be called multiple times if agent is re-initialized.
-        # Consider if it should be called once globally.
-        # For now, keeping original behavior.
-        try:
-            vertexai.init(project=project_id, location=location)
-            self.logger.info(
-                f"Vertex AI initialized for project '{project_id}' in location '{location}'."
-            )
-        except Exception as e:
-            self.logger.error(f"Failed to initialize Vertex AI: {e}", exc_info=True)
-            # Depending on severity, might want to raise this or handle gracefully.
-            # For now, logging and continuing.
-            pass  # Or raise e
+        _ensure_vertex_imported()
 
-        self.model = GenerativeModel(model_name)
+        # Initialize Vertex AI. vertexai.init() configures process-wide state and
+        # repeats credential discovery, so skip it when the same project and
+        # location are already active (e.g. when the agent is re-created).
+        global _VERTEX_INIT_KEY
+        vertex_key = (project_id, location)
+        if _VERTEX_INIT_KEY != vertex_key:
+            try:
+                vertexai.init(project=project_id, location=location)
+                _VERTEX_INIT_KEY = vertex_key
+                self.logger.info(
+                    f"Vertex AI initialized for project '{project_id}' in location '{location}'."
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to initialize Vertex AI: {e}", exc_info=True)
+                # Depending on severity, might want to raise this or handle gracefully.
+                # For now, logging and continuing.
+                pass  # Or raise e
+
+        model_key = (project_id, location, model_name)
+        model = _MODEL_CACHE.get(model_key)
+        if model is None:
+            model = _MODEL_CACHE[model_key] = GenerativeModel(model_name)
+        self.model = model
         self.logger.info(f"Using model: {model_name}")
 
         # Instantiate and store tool instances
+        # Serialized parameter schemas and the framework keyword arguments
+        # each tool's execute() accepts, filled in by _load_tools.
+        self._tool_params_json: Dict[str, str] = {}
+        self._tool_framework_kwargs: Dict[str, FrozenSet[str]] = {}
         self.tool_instances: Dict[str, BaseTool] = (
             self._load_tools()
         )  # _load_tools will use self.logger
         self.system_prompt = self._build_system_prompt()
+        # The system prompt never changes, so wrap it in a Part only once.
+        self._system_prompt_part = Part.from_text(self.system_prompt)
+
+        # agent_settings are resolved once here rather than on every use.
+        agent_settings = config.get("agent_settings") or {}
+        # Iterations granted by each [C]ontinue / [F]eedback in the prompt.
+        self._additional_iters = agent_settings.get("additional_iterations", 3)
+
+        # Streaming tool dispatch runs tools while the model is still streaming.
+        # A single worker keeps tool side effects in the order they were
+        # requested. Safe mode prompts on stdin, which cannot be interleaved
+        # with the streamed output, so it keeps the post-stream execution.
+        self._stream_dispatch_pool: Optional[ThreadPoolExecutor] = None
+        if agent_settings.get("streaming_tool_dispatch", False) and not safe_mode:
+            self._stream_dispatch_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="tool-dispatch"
+            )
+        # Read-only tool calls from one response run concurrently unless
+        # disabled (see _execute_tool_calls_async). Safe mode confirms each
+        # tool on stdin, so its calls always run one by one.
+        self._parallel_tool_execution = (
+            agent_settings.get("parallel_tool_execution", True) and not safe_mode
+        )
+        self._max_parallel_tools = max(
+            1, int(agent_settings.get("max_parallel_tools", 8))
+        )
+        # Tools are blocking code, so concurrent calls run on this agent's own
+        # thread pool (threads are only started when first needed).
+        self._tool_pool: Optional[ThreadPoolExecutor] = None
+        if self._parallel_tool_execution:
+            self._tool_pool = ThreadPoolExecutor(
+                max_workers=self._max_parallel_tools,
+                thread_name_prefix="tool",
+            )
+        # Results of is_cacheable tools, keyed by _tool_cache_key, oldest first.
+        self._tool_cache_size = int(agent_settings.get("tool_cache_size", 256))
+        self._tool_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tool_cache_lock = threading.Lock()
+        # Bumped by every clear, so a read that was running across a clear
+        # does not store its possibly stale result afterwards.
+        self._tool_cache_generation = 0
+        # Skip the interactive prompt once the model call has failed for good.
+        self._auto_stop_on_error = agent_settings.get("auto_stop_on_error", True)
         self.logger.debug("VertexAIAgent initialized.")
 
+    def close(self) -> None:
+        """Shuts down the agent's tool worker threads."""
+        for pool in (self._tool_pool, self._stream_dispatch_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._tool_pool = None
+        self._stream_dispatch_pool = None
+
     def _load_tools(self) -> Dict[str, BaseTool]:
-        """Dynamically loads tool classes from the 'tools' subdirectory."""
+        """Instantiates the tool classes registered with @register_tool."""
         loaded_tools: Dict[str, BaseTool] = {}
-        tools_package_path = os.path.join(os.path.dirname(__file__), "tools")
 
-        # Ensure the 'tools' directory is treated as a package
-        # This might involve adjusting sys.path or ensuring tools_package_path is discoverable
-        # For simplicity, we assume 'tools' is a sibling directory and importable.
-
-        for _, module_name, _ in pkgutil.iter_modules([tools_package_path]):
-            if module_name == "__init__" or module_name == "base_tool":
-                continue  # Skip __init__.py and base_tool.py itself
+        # Importing a tool module registers its class; the 'tools' package
+        # itself imports them lazily, so pull them all in here.
+        for tool_class in import_all_tools():
             try:
-                module = importlib.import_module(f"tools.{module_name}")
-                for attribute_name, attribute_value in inspect.getmembers(module):
-                    if (
-                        inspect.isclass(attribute_value)
-                        and issubclass(attribute_value, BaseTool)
-                        and attribute_value is not BaseTool
-                    ):
-                        try:
-                            tool_instance = attribute_value()
-                            loaded_tools[tool_instance.get_name()] = tool_instance
-                            # self.project_id check is no longer relevant for logging verbosity here
-                            self.logger.info(
-                                f"Successfully loaded tool: {tool_instance.get_name()} from {module_name}"
-                            )
-                        except Exception as e:
-                            self.logger.error(
-                                f"Error instantiating tool {attribute_name} from {module_name}: {e}",
-                                exc_info=True,
-                            )
-
-            except ImportError as e:
-                self.logger.error(
-                    f"Error importing module tools.{module_name}: {e}", exc_info=True
+                tool_instance = tool_class()
+                loaded_tools[tool_instance.get_name()] = tool_instance
+                self._tool_params_json[tool_instance.get_name()] = _json_dumps(
+                    tool_instance.get_parameters_schema() or {}
+                )
+                self._tool_framework_kwargs[tool_instance.get_name()] = (
+                    _accepted_framework_kwargs(tool_instance.execute)
+                )
+                self.logger.info(
+                    f"Successfully loaded tool: {tool_instance.get_name()} from {tool_class.__module__}"
                 )
             except Exception as e:
                 self.logger.error(
-                    f"An unexpected error occurred while loading tools from {module_name}: {e}",
+                    f"Error instantiating tool {tool_class.__name__} from {tool_class.__module__}: {e}",
                     exc_info=True,
                 )
 
@@ -237,28 +674,29 @@ class VertexAIAgent:
         """
         Extract text from Vertex AI response (or a chunk of it).
         This method is designed to be robust for both full responses and stream chunks.
+        It is called once per streamed chunk, so the common single-part chunk is
+        handled without building an intermediate list.
         """
-        try:
-            if hasattr(response, "candidates") and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, "content") and candidate.content:
-                    content = candidate.content
-                    if hasattr(content, "parts") and content.parts:
-                        text_parts = []
-                        for part in content.parts:
-                            if hasattr(part, "text") and part.text:
-                                text_parts.append(part.text)
-                        if text_parts:
-                            return "".join(text_parts)
-        except Exception:
-            pass
+        candidates = getattr(response, "candidates", None)
+        if candidates:
+            content = getattr(candidates[0], "content", None)
+            parts = getattr(content, "parts", None) if content else None
+            if parts:
+                if len(parts) == 1:
+                    text = getattr(parts[0], "text", None)
+                else:
+                    text = "".join(
+                        part_text
+                        for part_text in (getattr(part, "text", None) for part in parts)
+                        if part_text
+                    )
+                if text:
+                    return text
 
         try:
-            if hasattr(response, "text") and response.text:
-                return response.text
-        except Exception:
-            pass
-        return ""
+            return getattr(response, "text", None) or ""
+        except Exception:  # e.g. ValueError from responses without a text part
+            return ""
 
     def _build_system_prompt(self) -> str:
         """Build the system prompt that teaches the model how to use tools."""
@@ -306,11 +744,8 @@ The output of a tool, especially `execute_command`, is your only source of truth
         tool_descriptions = []
         for i, (name, tool_instance) in enumerate(self.tool_instances.items()):
             desc = f"{i+1}. **{tool_instance.get_name()}**: {tool_instance.get_description()}\n"
-            params_schema = tool_instance.get_parameters_schema()
-            if params_schema:  # Ensure there are parameters to describe
-                desc += f"    * **Parameters**: `{json.dumps(params_schema)}`\n"
-            else:  # Handle tools with no parameters
-                desc += f"    * **Parameters**: `{{}}`\n"
+            # Schemas are serialized once when the tools are loaded.
+            desc += f"    * **Parameters**: `{self._tool_params_json[name]}`\n"
 
             if tool_instance.get_name() == "execute_command":
                 desc += "    * **Crucial Note**: ALWAYS check the `return_code` and `stderr` fields in the result. A non-zero `return_code` indicates failure.\n"
@@ -321,47 +756,112 @@ The output of a tool, especially `execute_command`, is your only source of truth
         return system_prompt
 
     def _extract_tool_calls(self, text: str) -> List[Dict[str, Any]]:
+        """Extracts the JSON objects wrapped in <tool_call> tags from ``text``."""
+        tool_calls, _ = self._drain_tool_calls(text, 0)
+        return tool_calls
+
+    def _drain_tool_calls(
+        self, text: str, cursor: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Extracts the complete <tool_call> blocks found in ``text`` after ``cursor``.
+
+        The tags are located with str.find, which scans in C, and each body is
+        handed straight to the JSON decoder. Like the old regex, an open tag
+        only starts a block when a JSON object follows it.
+
+        Returns:
+            The parsed tool calls and the position just past the last complete
+            block, from which a later call can resume scanning.
+        """
         tool_calls = []
-        pattern = r"<tool_call>\s*(\{[\s\S]*?\})\s*</tool_call>"
-        matches = re.findall(pattern, text, re.DOTALL)
-        for match in matches:
+        while True:
+            start = text.find(_TOOL_CALL_OPEN, cursor)
+            if start < 0:
+                break
+            body_start = start + len(_TOOL_CALL_OPEN)
+            first = body_start
+            while first < len(text) and text[first].isspace():
+                first += 1
+            if first == len(text):
+                break  # The body has not streamed in yet.
+            if text[first] != "{":
+                # A mention of the tag in prose, not a call: a real block opens
+                # with a JSON object. Keep looking from just past this tag.
+                cursor = start + 1
+                continue
+            end = text.find(_TOOL_CALL_CLOSE, body_start)
+            if end < 0:
+                break
+            cursor = end + len(_TOOL_CALL_CLOSE)
+            body = text[body_start:end].strip()
             try:
-                clean_match = match.strip()
-                tool_call = json.loads(clean_match)
-                tool_calls.append(tool_call)
+                tool_call = _json_loads_tool_call(body)
             except json.JSONDecodeError as e:
                 self.logger.error(
-                    f"Error parsing tool call JSON: {e}. Problematic string: '{match}'",
+                    f"Error parsing tool call JSON: {e}. Problematic string: '{body}'",
                     exc_info=True,
                 )
-        return tool_calls
+                continue
+            if not isinstance(tool_call, dict):
+                self.logger.error(
+                    f"Tool call must be a JSON object. Problematic string: '{body}'"
+                )
+                continue
+            tool_calls.append(tool_call)
+        return tool_calls, cursor
 
     def _execute_tool_call(
         self, tool_call: Dict[str, Any], trace_id: Optional[str]
     ) -> Dict[str, Any]:
-        tool_name = tool_call.get("tool")
-        parameters = tool_call.get("parameters", {})
-        self.logger.debug(f"Executing tool: {tool_name} with params: {parameters}")
-
-        if tool_name not in self.tool_instances:
+        try:
+            tool_name = tool_call["tool"]
+        except KeyError:
+            self.logger.error(f"Tool call is missing the 'tool' field: {tool_call}")
+            return {"success": False, "error": "Tool call is missing the 'tool' field."}
+        parameters = tool_call.get("parameters") or {}
+        if self._debug_enabled:
+            self.logger.debug(f"Executing tool: {tool_name} with params: {parameters}")
+
+        tool_instance = self.tool_instances.get(tool_name)
+        if tool_instance is None:
             self.logger.error(f"Unknown tool called: {tool_name}")
             return {"success": False, "error": f"Unknown tool: {tool_name}"}
 
-        tool_instance = self.tool_instances[tool_name]
+        cache_key = None
+        generation = 0
+        invalidates_cache = False
+        if tool_instance.is_cacheable and self._tool_cache_size > 0:
+            cache_key = self._tool_cache_key(tool_name, parameters)
+            with self._tool_cache_lock:
+                cached = self._tool_cache.get(cache_key)
+                if cached is not None:
+                    self._tool_cache.move_to_end(cache_key)
+                generation = self._tool_cache_generation
+            if cached is not None:
+                self.logger.debug(f"Tool cache hit for {tool_name}.")
+                return dict(cached)
+        elif not tool_instance.is_concurrency_safe:
+            # The tool may change files or the working directory, so earlier
+            # read results can no longer be trusted.
+            self._clear_tool_cache()
+            invalidates_cache = True
+
+        # Pass safe mode, trace_id, config and the confirmer to the tools that
+        # accept them.
+        framework_kwargs = {
+            "agent_safe_mode": self.safe_mode,
+            "trace_id": trace_id,
+            "config": self.config,
+            "confirm": self.confirm,
+        }
+        accepted = self._tool_framework_kwargs.get(tool_name, _FRAMEWORK_KWARGS)
+        if accepted is not _FRAMEWORK_KWARGS:
+            framework_kwargs = {
+                key: value for key, value in framework_kwargs.items() if key in accepted
+            }
         try:
-            # Pass trace_id to the tool's execute method
-            if not tool_instance.get_parameters_schema() and not parameters:
-                return tool_instance.execute(
-                    agent_safe_mode=self.safe_mode,
-                    trace_id=trace_id,
-                    config=self.config,
-                )
-            return tool_instance.execute(
-                **parameters,
-                agent_safe_mode=self.safe_mode,
-                trace_id=trace_id,
-                config=self.config,
-            )
+            result = tool_instance.execute(**parameters, **framework_kwargs)
         except TypeError as te:
             param_schema = tool_instance.get_parameters_schema()
             error_msg = f"Tool execution error for '{tool_name}': Invalid or missing parameters. Expected: {param_schema}. Received: {parameters}. Details: {str(te)}"
@@ -375,24 +875,253 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 "success": False,
                 "error": f"Tool execution error for '{tool_name}': {str(e)}",
             }
+        finally:
+            if invalidates_cache:
+                # Reads that ran while the tool did may have cached stale results.
+                self._clear_tool_cache()
+
+        if cache_key is not None and isinstance(result, dict) and result.get("success"):
+            with self._tool_cache_lock:
+                if generation == self._tool_cache_generation:
+                    self._tool_cache[cache_key] = dict(result)
+                    if len(self._tool_cache) > self._tool_cache_size:
+                        self._tool_cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _tool_cache_key(tool_name: str, parameters: Dict[str, Any]) -> str:
+        """Returns the tool-cache key for a call: a hash of its name and arguments."""
+        canonical = json.dumps(parameters, sort_keys=True, default=str)
+        return hashlib.blake2b(
+            f"{tool_name}:{canonical}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def _clear_tool_cache(self) -> None:
+        """Drops every cached tool result."""
+        with self._tool_cache_lock:
+            self._tool_cache.clear()
+            self._tool_cache_generation += 1
+
+    @staticmethod
+    def _append_model_turn(
+        conversation_history: List["Part"],
+        response_text: str,
+        function_calls: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Records a model reply in the history, prefixed with ``Agent: `` so the
+        role survives in the flat Part list. Native ``function_calls`` are
+        written out as <tool_call> blocks ahead of the text, so each later
+        function_response has a matching call. Empty replies are skipped,
+        since Vertex rejects empty text parts.
+        """
+        turn_text = "".join(
+            f"{_TOOL_CALL_OPEN}{_json_dumps(tool_call)}{_TOOL_CALL_CLOSE}\n"
+            for tool_call in function_calls or ()
+        ) + response_text
+        if turn_text:
+            conversation_history.append(Part.from_text(f"Agent: {turn_text}"))
 
     def _process_response(
-        self, response_text: str, trace_id: Optional[str]
+        self,
+        response_text: str,
+        trace_id: Optional[str],
+        dispatched_tool_calls: Optional[List[Tuple[Dict[str, Any], Future]]] = None,
+        function_calls: Optional[List[Dict[str, Any]]] = None,
     ) -> tuple[str, List[Dict[str, Any]]]:
+        """
+        Executes the tool calls in ``response_text`` and collects their results.
+
+        When the calls were already dispatched while the response was streaming,
+        ``dispatched_tool_calls`` holds them with their futures and only the
+        results are gathered here. ``function_calls`` holds calls the model
+        made as native function_call parts; they run before the text calls
+        unless they were already dispatched.
+        """
+        if dispatched_tool_calls is not None:
+            if dispatched_tool_calls:
+                self.logger.info(
+                    f"Collecting {len(dispatched_tool_calls)} tool_call(s) dispatched during streaming."
+                )
+            tool_results = [
+                {"tool_call": tool_call, "result": future.result()}
+                for tool_call, future in dispatched_tool_calls
+            ]
+            return response_text, tool_results
+
         tool_calls = self._extract_tool_calls(response_text)
-        tool_results = []
-        if tool_calls:
-            self.logger.info(f"Detected {len(tool_calls)} tool_call(s).")
-        for tool_call in tool_calls:
-            result = self._execute_tool_call(
-                tool_call, trace_id=trace_id
-            )  # Pass trace_id
-            tool_results.append({"tool_call": tool_call, "result": result})
+        if function_calls:
+            tool_calls = function_calls + tool_calls
+        if not tool_calls:
+            return response_text, []
+        self.logger.info(f"Detected {len(tool_calls)} tool_call(s).")
+        if self._parallel_tool_execution and len(tool_calls) > 1:
+            results = asyncio.run(self._execute_tool_calls_async(tool_calls, trace_id))
+        else:
+            results = [
+                self._execute_tool_call(tool_call, trace_id=trace_id)
+                for tool_call in tool_calls
+            ]
+        tool_results = [
+            {"tool_call": tool_call, "result": result}
+            for tool_call, result in zip(tool_calls, results)
+        ]
         return response_text, tool_results
 
+    async def _execute_tool_calls_async(
+        self, tool_calls: List[Dict[str, Any]], trace_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs tool calls on worker threads, overlapping the concurrency-safe ones.
+
+        Calls run on the agent's tool thread pool. Consecutive calls to tools
+        marked ``is_concurrency_safe`` run together, at most
+        ``max_parallel_tools`` at a time. Any other call waits for the calls
+        before it to finish and runs on its own, so reads never overlap the
+        writes they were requested before or after.
+
+        Returns:
+            The results, in the same order as ``tool_calls``.
+        """
+        semaphore = asyncio.Semaphore(self._max_parallel_tools)
+        loop = asyncio.get_running_loop()
+
+        async def run(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                # Run in a copy of this context so the tool's log records keep
+                # the task's trace ID.
+                return await loop.run_in_executor(
+                    self._tool_pool,
+                    functools.partial(
+                        contextvars.copy_context().run,
+                        self._execute_tool_call,
+                        tool_call,
+                        trace_id,
+                    ),
+                )
+
+        results: List[Any] = []
+        batch: List["asyncio.Future[Dict[str, Any]]"] = []
+        # Single-flight map: identical calls to a cacheable tool within a batch
+        # share one execution (gather accepts the same future more than once).
+        inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        for tool_call in tool_calls:
+            tool_instance = self.tool_instances.get(tool_call.get("tool"))
+            if tool_instance is None or tool_instance.is_concurrency_safe:
+                if tool_instance is not None and tool_instance.is_cacheable:
+                    key = self._tool_cache_key(
+                        tool_call["tool"], tool_call.get("parameters") or {}
+                    )
+                    future = inflight.get(key)
+                    if future is None:
+                        future = inflight[key] = asyncio.ensure_future(run(tool_call))
+                else:
+                    future = asyncio.ensure_future(run(tool_call))
+                batch.append(future)
+                continue
+            if batch:
+                results += await asyncio.gather(*batch, return_exceptions=True)
+                batch = []
+                inflight.clear()
+            results += await asyncio.gather(run(tool_call), return_exceptions=True)
+        if batch:
+            results += await asyncio.gather(*batch, return_exceptions=True)
+
+        return [
+            (
+                {"success": False, "error": f"Tool execution error: {result}"}
+                if isinstance(result, BaseException)
+                else result
+            )
+            for result in results
+        ]
+
+    def _stream_response(
+        self, response_stream: Iterable["GenerateContentResponse"], trace_id: Optional[str]
+    ) -> Tuple[
+        str,
+        Optional[List[Tuple[Dict[str, Any], Future]]],
+        List[Dict[str, Any]],
+    ]:
+        """
+        Echoes a response stream to stdout and returns the full response text.
+
+        With ``agent_settings.streaming_tool_dispatch`` enabled, every tool call
+        is submitted for execution as soon as it is complete: a <tool_call>
+        block once its closing tag has streamed in, or a native function_call
+        part as soon as its chunk arrives. Tools then run while the model is
+        still generating the rest of the turn.
+
+        Returns:
+            A tuple containing:
+                - The concatenated response text.
+                - The dispatched tool calls with their futures, or None when
+                  streaming dispatch is disabled.
+                - The native function calls, whether or not they were
+                  dispatched, so the stored turn can record them.
+        """
+        text_parts: List[str] = []
+        dispatch_pool = self._stream_dispatch_pool
+        dispatched: Optional[List[Tuple[Dict[str, Any], Future]]] = (
+            [] if dispatch_pool is not None else None
+        )
+        cursor = 0
+        # Tail of the text seen so far, long enough to catch a closing tag that
+        # is split across chunks.
+        carry = ""
+
+        function_calls: List[Dict[str, Any]] = []
+
+        def dispatch(tool_calls: List[Dict[str, Any]]) -> None:
+            for tool_call in tool_calls:
+                # Run in a copy of this context so the tool's log records
+                # keep the task's trace ID.
+                future = dispatch_pool.submit(
+                    contextvars.copy_context().run,
+                    self._execute_tool_call,
+                    tool_call,
+                    trace_id,
+                )
+                dispatched.append((tool_call, future))
+
+        def dispatch_completed_calls() -> None:
+            nonlocal cursor
+            tool_calls, cursor = self._drain_tool_calls("".join(text_parts), cursor)
+            dispatch(tool_calls)
+
+        echo = _StreamEcho() if ECHO_STREAM.get() else None
+        try:
+            for chunk_response in response_stream:
+                chunk_calls = _function_calls_in_chunk(chunk_response)
+                if chunk_calls:
+                    # Kept either way so the stored turn records them.
+                    function_calls.extend(chunk_calls)
+                    if dispatch_pool is not None:
+                        dispatch(chunk_calls)
+                chunk_text = self._get_response_text(chunk_response)
+                if not chunk_text:
+                    continue
+                if echo is not None:
+                    echo.write(chunk_text)
+                text_parts.append(chunk_text)
+                if dispatch_pool is not None:
+                    window = carry + chunk_text
+                    if _TOOL_CALL_CLOSE in window:
+                        dispatch_completed_calls()
+                    carry = window[-(len(_TOOL_CALL_CLOSE) - 1) :]
+        finally:
+            # Newline after streaming; it also flushes whatever is buffered,
+            # including the partial output of a stream that failed midway.
+            if echo is not None:
+                echo.write("\n")
+
+        if dispatch_pool is not None:
+            dispatch_completed_calls()
+        return "".join(text_parts), dispatched, function_calls
+
     def _generate_content_with_retry_and_stream(
-        self, current_prompt_parts: List[Part]
-    ) -> Tuple[Optional[Iterable[GenerateContentResponse]], Optional[Exception]]:
+        self, current_prompt_parts: List["Part"]
+    ) -> Tuple[Optional[Iterable["GenerateContentResponse"]], Optional[Exception]]:
         """
         Generates content from the model with retry logic for API calls and initiates the stream.
         The 'verbose' parameter is removed as logging is now handled by self.logger.
@@ -405,7 +1134,7 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 - The response stream (Iterable[GenerateContentResponse]) if successful, else None.
                 - The last encountered Exception if an error occurred, else None.
         """
-        response_stream: Optional[Iterable[GenerateContentResponse]] = None
+        response_stream: Optional[Iterable["GenerateContentResponse"]] = None
         api_call_succeeded = False
         last_api_error: Optional[Exception] = None
 
@@ -419,9 +1148,10 @@ The output of a tool, especially `execute_command`, is your only source of truth
                         f"Retrying API call to model (attempt {attempt + 1}/{max_api_retries})..."
                     )
 
-                self.logger.debug(
-                    f"Generating content with {len(current_prompt_parts)} parts. First part type: {type(current_prompt_parts[0]) if current_prompt_parts else 'N/A'}"
-                )
+                if self._debug_enabled:
+                    self.logger.debug(
+                        f"Generating content with {len(current_prompt_parts)} parts. First part type: {type(current_prompt_parts[0]) if current_prompt_parts else 'N/A'}"
+                    )
                 response_stream = self.model.generate_content(
                     current_prompt_parts, stream=True
                 )
@@ -435,8 +1165,8 @@ The output of a tool, especially `execute_command`, is your only source of truth
                     f"API call failed (attempt {attempt + 1}/{max_api_retries}): Internal Server Error (500). Details: {e_ise}"
                 )
                 if attempt < max_api_retries - 1:
-                    delay = base_retry_delay * (2**attempt)
-                    self.logger.info(f"Will retry after {delay} seconds.")
+                    delay = _backoff_delay(base_retry_delay, attempt)
+                    self.logger.info(f"Will retry after {delay:.2f} seconds.")
                     time.sleep(delay)
                 else:
                     self.logger.error(
@@ -448,10 +1178,10 @@ The output of a tool, especially `execute_command`, is your only source of truth
                     f"API call failed (attempt {attempt + 1}/{max_api_retries}): Resource Exhausted ({e_re.code}). Details: {e_re}"
                 )
                 if attempt < max_api_retries - 1:
-                    delay = base_retry_delay * (
-                        2**attempt
-                    )  # Consider checking for Retry-After header if available
-                    self.logger.info(f"Will retry after {delay} seconds.")
+                    delay = _retry_after_seconds(e_re)
+                    if delay is None:
+                        delay = _backoff_delay(base_retry_delay, attempt)
+                    self.logger.info(f"Will retry after {delay:.2f} seconds.")
                     time.sleep(delay)
                 else:
                     self.logger.error(
@@ -481,16 +1211,103 @@ The output of a tool, especially `execute_command`, is your only source of truth
         self.logger.debug("API call successful, returning stream.")
         return response_stream, None
 
-    def execute_task(self, task: str, max_iterations: int, interactive: bool) -> str:
-        # Generate a unique trace ID for this task execution
+    def execute_task(
+        self,
+        task: str,
+        max_iterations: int,
+        interactive: bool,
+        clear_tool_cache: bool = True,
+    ) -> str:
+        # Generate a unique trace ID for this task execution; TraceIdFilter
+        # stamps it onto every log record emitted while the task runs.
         current_trace_id = uuid.uuid4().hex
-        self.logger.extra["trace_id"] = current_trace_id  # Set trace_id for this task
+        token = TRACE_ID.set(current_trace_id)
+        try:
+            return self._run_task(
+                task, max_iterations, interactive, current_trace_id, clear_tool_cache
+            )
+        finally:
+            TRACE_ID.reset(token)
+
+    def execute_tasks_batch(
+        self,
+        tasks: List[str],
+        max_iterations: int,
+        max_concurrency: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Runs independent tasks concurrently, non-interactively.
+
+        Each task runs ``execute_task`` on a worker thread with its own trace
+        ID. At most ``max_concurrency`` run at once, which defaults to the
+        ``max_concurrent_requests`` API retry setting (4) to respect Vertex AI
+        rate limits. Tasks share the process's working directory, so they
+        should not rely on ``change_directory``. They also share the tool
+        cache, which is cleared once up front rather than as each task starts;
+        a read that overlaps another task's write is not cached. Streamed
+        model output is not echoed, since concurrent tasks would interleave
+        it on stdout.
 
+        Safe mode needs a non-interactive ``confirm`` callable, since the
+        default stdin prompt cannot serve several tasks at once.
+
+        Args:
+            tasks: The task descriptions.
+            max_iterations: Maximum iterations for each task.
+            max_concurrency: Upper bound on tasks running at the same time.
+
+        Returns:
+            The final response text of each task, in the order of ``tasks``.
+
+        Raises:
+            ValueError: If safe mode is on and ``confirm`` is the stdin prompt.
+        """
+        if self.safe_mode and self.confirm is confirm_with_input:
+            raise ValueError(
+                "Batch execution in safe mode requires a non-interactive confirm callable."
+            )
+        # Files may have changed since the previous task.
+        self._clear_tool_cache()
+        if max_concurrency is None:
+            max_concurrency = self.api_retry_config.get("max_concurrent_requests", 4)
+        return asyncio.run(
+            self._execute_tasks_batch_async(
+                tasks, max_iterations, max(1, max_concurrency)
+            )
+        )
+
+    async def _execute_tasks_batch_async(
+        self, tasks: List[str], max_iterations: int, max_concurrency: int
+    ) -> List[str]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # asyncio.run gave this coroutine its own context, which the tasks
+        # and their worker threads inherit.
+        ECHO_STREAM.set(False)
+
+        async def guarded(task: str) -> str:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self.execute_task, task, max_iterations, False, False
+                )
+
+        return list(await asyncio.gather(*(guarded(task) for task in tasks)))
+
+    def _run_task(
+        self,
+        task: str,
+        max_iterations: int,
+        interactive: bool,
+        current_trace_id: str,
+        clear_tool_cache: bool = True,
+    ) -> str:
         self.logger.info(
             f"Starting task execution. Task: '{task}'. Max iterations: {max_iterations}. Interactive: {interactive}."
         )
 
-        conversation_history = [Part.from_text(self.system_prompt)]
+        if clear_tool_cache:
+            # Files may have changed since the previous task.
+            self._clear_tool_cache()
+        conversation_history = [self._system_prompt_part]
         conversation_history.append(Part.from_text(f"User: Task: {task}"))
         iteration = 0
         final_response_text = "Task execution did not produce a final agent response."
@@ -499,12 +1316,9 @@ The output of a tool, especially `execute_command`, is your only source of truth
             iteration += 1
             self.logger.info(f"Iteration {iteration} / {max_iterations}")
 
-            current_prompt_parts = [p for p in conversation_history]
-            # response_text = "" # Not needed here, accumulated_response_text_parts is used
-            accumulated_response_text_parts = []
-
+            # generate_content does not mutate the history, so send it as is.
             response_stream, api_error = self._generate_content_with_retry_and_stream(
-                current_prompt_parts
+                conversation_history
             )
 
             if response_stream is None:
@@ -520,29 +1334,18 @@ The output of a tool, especially `execute_command`, is your only source of truth
                     "Agent (streaming): ", extra={"continued_log": True}
                 )  # Custom flag for potential special handling
 
-                accumulated_response_text_parts = []
-
-                for chunk_response in response_stream:
-                    chunk_text = self._get_response_text(chunk_response)
-                    if chunk_text:
-                        # For verbose streaming to console, we might need a dedicated stream handler
-                        # or rely on the main script's print for this specific part if self.logger.debug is too noisy.
-                        # For now, let's assume self.logger.debug is fine, or a higher level like INFO if it's always desired.
-                        # If we want to replicate the exact print(..., end="") behavior, that's harder with standard logging.
-                        # A simple approach is to accumulate and log once, or log each chunk.
-                        sys.stdout.write(
-                            chunk_text
-                        )  # Replicating print(chunk_text, end="", flush=True)
-                        sys.stdout.flush()
-                        accumulated_response_text_parts.append(chunk_text)
-
-                sys.stdout.write("\n")  # Newline after streaming
-                sys.stdout.flush()
-
-                response_text = "".join(accumulated_response_text_parts)
-                self.logger.debug(
-                    f"Full agent response (length {len(response_text)}): {response_text[:500]}{'...' if len(response_text) > 500 else ''}"
+                (
+                    response_text,
+                    dispatched_tool_calls,
+                    function_calls,
+                ) = self._stream_response(
+                    response_stream, current_trace_id
                 )
+                if self._debug_enabled:
+                    response_len = len(response_text)
+                    self.logger.debug(
+                        f"Full agent response (length {response_len}): {response_text[:500]}{'...' if response_len > 500 else ''}"
+                    )
                 final_response_text = response_text
 
             except google_api_exceptions.InternalServerError as e_stream_ise:
@@ -570,13 +1373,18 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 )
                 break
 
-            if not response_text and not accumulated_response_text_parts:
+            if not response_text:
                 self.logger.info("Model returned an empty response stream.")
 
             processed_response_text, tool_results = self._process_response(
-                response_text, trace_id=current_trace_id
+                response_text,
+                trace_id=current_trace_id,
+                dispatched_tool_calls=dispatched_tool_calls,
+                function_calls=function_calls,
+            )
+            self._append_model_turn(
+                conversation_history, response_text, function_calls
             )
-            conversation_history.append(Part.from_text(f"Agent: {response_text}"))
 
             if not tool_results:
                 self.logger.info(
@@ -589,13 +1397,14 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 tool_call_details = tool_data["tool_call"]
                 tool_execution_result = tool_data["result"]
                 tool_name = tool_call_details.get("tool", "Unknown tool")
-                tool_params = tool_call_details.get("parameters", {})
 
-                self.logger.debug(f"Tool Call: {tool_name}")
-                self.logger.debug(f"Parameters: {json.dumps(tool_params, indent=2)}")
+                # The JSON is only built if a DEBUG record is actually emitted.
+                self.logger.debug("Tool Call: %s", tool_name)
                 self.logger.debug(
-                    f"Result: {json.dumps(tool_execution_result, indent=2)}"
+                    "Parameters: %s",
+                    _LazyJSON(tool_call_details.get("parameters", {})),
                 )
+                self.logger.debug("Result: %s", _LazyJSON(tool_execution_result))
 
                 function_response_part = Part.from_function_response(
                     name=tool_name, response={"content": tool_execution_result}
@@ -609,35 +1418,53 @@ The output of a tool, especially `execute_command`, is your only source of truth
         ):
             self.logger.warning(f"Reached maximum iterations ({max_iterations}).")
             if interactive:
-                while True:
-                    final_response_text = self._handle_interactive_prompt(
-                        conversation_history,
-                        iteration,
-                        current_trace_id,
-                        final_response_text,
-                        self.safe_mode,  # Pass agent_safe_mode
-                    )
+                final_response_text = self._handle_interactive_prompt(
+                    conversation_history,
+                    iteration,
+                    current_trace_id,
+                    final_response_text,
+                    self.safe_mode,  # Pass agent_safe_mode
+                )
         self.logger.info(
             f"Task execution finished. Final response preview: {final_response_text[:100]}{'...' if len(final_response_text) > 100 else ''}"
         )
-        self.logger.extra["trace_id"] = None  # Clear trace_id after task completion
         return final_response_text
 
     def execute_task_continuation(
         self,
-        conversation_history: List[Part],
+        conversation_history: List["Part"],
         additional_iterations: int,
         current_iteration_count: int,
         interactive: bool,
         trace_id: Optional[str],
     ) -> str:
         # Set the trace_id for this continuation
-        original_trace_id = self.logger.extra.get("trace_id")
-        self.logger.extra["trace_id"] = trace_id
+        token = TRACE_ID.set(trace_id)
+        try:
+            return self._run_task_continuation(
+                conversation_history,
+                additional_iterations,
+                current_iteration_count,
+                interactive,
+                trace_id,
+            )
+        finally:
+            TRACE_ID.reset(token)
 
+    def _run_task_continuation(
+        self,
+        conversation_history: List["Part"],
+        additional_iterations: int,
+        current_iteration_count: int,
+        interactive: bool,
+        trace_id: Optional[str],
+    ) -> str:
         self.logger.info(
             f"Continuing task. Additional iterations: {additional_iterations}. Current total iterations: {current_iteration_count}."
         )
+
+        # The user may have edited files while the task was paused.
+        self._clear_tool_cache()
         iteration = 0
         max_iterations_for_continuation = additional_iterations
         final_response_text = "Continuation did not produce a new agent response."
@@ -649,11 +1476,9 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 f"Continuation Iteration {global_iteration} (Local: {iteration}/{max_iterations_for_continuation})"
             )
 
-            current_prompt_parts = [p for p in conversation_history]
-            accumulated_response_text_parts = []
-
+            # generate_content does not mutate the history, so send it as is.
             response_stream, api_error = self._generate_content_with_retry_and_stream(
-                current_prompt_parts
+                conversation_history
             )
 
             if response_stream is None:
@@ -670,22 +1495,19 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 self.logger.debug(
                     "Agent (streaming continuation): ", extra={"continued_log": True}
                 )
-                accumulated_response_text_parts = []
 
-                for chunk_response in response_stream:
-                    chunk_text = self._get_response_text(chunk_response)
-                    if chunk_text:
-                        sys.stdout.write(chunk_text)  # Replicating print behavior
-                        sys.stdout.flush()
-                        accumulated_response_text_parts.append(chunk_text)
-
-                sys.stdout.write("\n")  # Newline after streaming
-                sys.stdout.flush()
-
-                response_text = "".join(accumulated_response_text_parts)
-                self.logger.debug(
-                    f"Full agent response (continuation, length {len(response_text)}): {response_text[:500]}{'...' if len(response_text) > 500 else ''}"
+                (
+                    response_text,
+                    dispatched_tool_calls,
+                    function_calls,
+                ) = self._stream_response(
+                    response_stream, trace_id
                 )
+                if self._debug_enabled:
+                    response_len = len(response_text)
+                    self.logger.debug(
+                        f"Full agent response (continuation, length {response_len}): {response_text[:500]}{'...' if response_len > 500 else ''}"
+                    )
                 final_response_text = response_text
 
             except google_api_exceptions.InternalServerError as e_stream_ise:
@@ -711,15 +1533,20 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 final_response_text = f"Unexpected stream error during model generation in continuation: {e_stream_other}"
                 break
 
-            if not response_text and not accumulated_response_text_parts:
+            if not response_text:
                 self.logger.info(
                     "Model returned an empty response stream during continuation."
                 )
 
             processed_response_text, tool_results = self._process_response(
-                response_text, trace_id=trace_id
+                response_text,
+                trace_id=trace_id,
+                dispatched_tool_calls=dispatched_tool_calls,
+                function_calls=function_calls,
             )  # Pass trace_id
-            conversation_history.append(Part.from_text(f"Agent: {response_text}"))
+            self._append_model_turn(
+                conversation_history, response_text, function_calls
+            )
 
             if not tool_results:
                 self.logger.info(
@@ -733,13 +1560,13 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 tool_execution_result = tool_data["result"]
                 tool_name = tool_call_details.get("tool", "Unknown tool")
 
-                self.logger.debug(f"Tool Call: {tool_name}")
+                # The JSON is only built if a DEBUG record is actually emitted.
+                self.logger.debug("Tool Call: %s", tool_name)
                 self.logger.debug(
-                    f"Parameters: {json.dumps(tool_call_details.get('parameters', {}), indent=2)}"
-                )
-                self.logger.debug(
-                    f"Result: {json.dumps(tool_execution_result, indent=2)}"
+                    "Parameters: %s",
+                    _LazyJSON(tool_call_details.get("parameters", {})),
                 )
+                self.logger.debug("Result: %s", _LazyJSON(tool_execution_result))
 
                 function_response_part = Part.from_function_response(
                     name=tool_name, response={"content": tool_execution_result}
@@ -755,14 +1582,47 @@ The output of a tool, especially `execute_command`, is your only source of truth
                 f"Continuation finished its {max_iterations_for_continuation} iterations."
             )
 
-        self.logger.extra["trace_id"] = (
-            original_trace_id  # Restore original trace_id or None
-        )
         return final_response_text
 
+    @staticmethod
+    def _format_history(conversation_history: List["Part"]) -> str:
+        """Renders the conversation history for the [R]eview History option."""
+        lines = ["\n--- Conversation History ---\n"]
+        if not conversation_history:
+            lines.append("History is empty.\n")
+        for i, part in enumerate(conversation_history):
+            if part.text:
+                # Agent and user messages carry their own prefix.
+                if part.text.startswith(("Agent:", "User:")):
+                    lines.append(f"[{i+1}] {part.text}\n")
+                else:  # Default to just text if no clear prefix
+                    lines.append(f"[{i+1}] Text: {part.text}\n")
+            elif part.function_call:
+                fc = part.function_call
+                lines.append(f"[{i+1}] Tool Call: {fc.name}, Args: {dict(fc.args)}\n")
+            elif part.function_response:
+                fr = part.function_response
+                # Ensure response content is extracted correctly
+                response_content = (
+                    fr.response.get("content", "N/A")
+                    if isinstance(fr.response, dict)
+                    else fr.response
+                )
+                # Serialize structured results; strings are written as they are.
+                if isinstance(response_content, (dict, list)):
+                    try:
+                        response_content = _json_dumps(response_content)
+                    except TypeError:
+                        pass
+                lines.append(f"[{i+1}] Tool Result for '{fr.name}': {response_content}\n")
+            else:
+                lines.append(f"[{i+1}] Unknown part type: {part}\n")
+        lines.append("--- End of History ---\n\n")
+        return "".join(lines)
+
     def _handle_interactive_prompt(
         self,
-        conversation_history: List[Part],
+        conversation_history: List["Part"],
         current_iteration_count: int,
         current_trace_id: Optional[str],
         initial_final_response_text: str,
@@ -785,24 +1645,21 @@ The output of a tool, especially `execute_command`, is your only source of truth
         """
         final_response_text = initial_final_response_text
         while True:
-            # Using print here for direct user interaction, not logging.
-            print(
-                "\nThe agent may need more steps or different guidance to complete the task."
-            )
-            print("\nOptions:")
-            print("  [C]ontinue       - Continue for more iterations")
-            print("  [F]eedback       - Provide feedback to the agent")
-            print("  [R]eview History - Display conversation history")
-            print("  [S]top Task      - Stop the current task")
-            print("  [V]erbose Toggle - Toggle verbose logging (DEBUG/INFO)")
+            # A failed model call cannot be continued, so don't ask.
+            if self._auto_stop_on_error and final_response_text.startswith(
+                _TERMINAL_ERROR_PREFIXES
+            ):
+                self.logger.info("Terminal error; skipping interactive prompt.")
+                break
+            # Written directly for user interaction, not logging.
+            sys.stdout.write(_PROMPT_MENU)
+            sys.stdout.flush()
             try:
                 choice = input("Your choice: ").strip().lower()
 
-                if choice in ["c", "continue"]:
+                if choice in _CHOICE_CONTINUE:
                     self.logger.info("User chose to [C]ontinue the task.")
-                    additional_iters = self.config.get("agent_settings", {}).get(
-                        "additional_iterations", 3
-                    )
+                    additional_iters = self._additional_iters
                     self.logger.info(
                         f"Continuing for {additional_iters} additional iterations."
                     )
@@ -813,8 +1670,8 @@ The output of a tool, especially `execute_command`, is your only source of truth
                         True,  # interactive is always True here
                         current_trace_id,
                     )
-                    break
-                elif choice in ["f", "feedback"]:
+                    continue  # Show options again
+                elif choice in _CHOICE_FEEDBACK:
                     self.logger.info("User chose to provide [F]eedback.")
                     user_feedback_text = input(
                         "Please provide your feedback or guidance for the agent: "
@@ -826,9 +1683,7 @@ The output of a tool, especially `execute_command`, is your only source of truth
                         self.logger.info(
                             f"User feedback added to history: '{user_feedback_text[:100]}...'"
                         )
-                        additional_iters = self.config.get("agent_settings", {}).get(
-                            "additional_iterations", 3
-                        )
+                        additional_iters = self._additional_iters
                         self.logger.info(
                             f"Continuing with feedback for {additional_iters} additional iterations."
                         )
@@ -839,51 +1694,21 @@ The output of a tool, especially `execute_command`, is your only source of truth
                             True,  # interactive is always True here
                             current_trace_id,
                         )
-                        break
+                        continue  # Show options again
                     else:
                         print("No feedback provided. Please choose an option.")
                         continue
-                elif choice in ["r", "review", "review history"]:
+                elif choice in _CHOICE_REVIEW:
                     self.logger.info("User chose to [R]eview History.")
-                    print("\n--- Conversation History ---")
-                    if not conversation_history:
-                        print("History is empty.")
-                    for i, part in enumerate(conversation_history):
-                        print(f"[{i+1}] ", end="")
-                        if part.text:
-                            # Check if it's an agent or user message based on prefix
-                            if part.text.startswith("Agent:"):
-                                print(f"{part.text}")
-                            elif part.text.startswith("User:"):
-                                print(f"{part.text}")
-                            else:  # Default to just text if no clear prefix
-                                print(f"Text: {part.text}")
-                        elif part.function_call:
-                            fc = part.function_call
-                            print(f"Tool Call: {fc.name}, Args: {dict(fc.args)}")
-                        elif part.function_response:
-                            fr = part.function_response
-                            # Ensure response content is extracted correctly
-                            response_content = (
-                                fr.response.get("content", "N/A")
-                                if isinstance(fr.response, dict)
-                                else fr.response
-                            )
-                            print(f"Tool Result for '{fr.name}': {response_content}")
-                        else:
-                            print(f"Unknown part type: {part}")
-                    print("--- End of History ---\n")
+                    # One buffered write instead of a print (and flush) per part.
+                    sys.stdout.write(self._format_history(conversation_history))
+                    sys.stdout.flush()
                     continue  # Show options again
-                elif choice in ["s", "stop", "stop task"]:
+                elif choice in _CHOICE_STOP:
                     self.logger.info("User chose to [S]top the task.")
                     break
-                elif choice in ["v", "verbose", "verbose toggle"]:
-                    current_level = (
-                        self.logger.logger.getEffectiveLevel()
-                        if hasattr(self.logger, "logger")
-                        else self.logger.getEffectiveLevel()
-                    )
-                    if current_level == logging.DEBUG:
+                elif choice in _CHOICE_VERBOSE:
+                    if self._debug_enabled:
                         self.logger.setLevel(logging.INFO)
                         print("Verbose logging OFF. Log level set to INFO.")
                         self.logger.info(
@@ -895,21 +1720,42 @@ The output of a tool, especially `execute_command`, is your only source of truth
                         self.logger.info(
                             "Verbose logging ON by user. Log level set to DEBUG."
                         )
+                    self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
                     continue  # Show options again
                 else:
                     print(
                         f"Invalid choice: '{choice}'. Please select from the available options."
                     )
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 self.logger.info("User interrupted continuation choice.")
                 print("\nStopping task due to user interruption.")
                 break
             except Exception as e:
                 self.logger.error(f"Error in interactive loop: {e}", exc_info=True)
+        return final_response_text
 
 
-def main():
-    """Main function to parse arguments, initialize and run the agent."""
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line.
+
+    The common ``agent.py TASK`` invocation, with no options, is answered
+    directly without building the ArgumentParser.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) == 1 and not argv[0].startswith("-"):
+        return argparse.Namespace(
+            task=argv[0],
+            max_iterations=None,
+            interactive=None,
+            config_path=DEFAULT_CONFIG_PATH,
+            verbose=False,
+            safe_mode=None,
+            backup_extension=None,
+            backup_dir=None,
+        )
+
     parser = argparse.ArgumentParser(description="Vertex AI Agent CLI")
     parser.add_argument("task", help="The task for the agent to perform.")
     parser.add_argument(
@@ -952,7 +1798,12 @@ def main():
         help="Directory to store backups (overrides config).",
     )
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to parse arguments, initialize and run the agent."""
+    args = _parse_args()
 
     # Load configuration
     config = load_config(args.config_path)
@@ -972,7 +1823,11 @@ def main():
     # Restore any *.bak files so the agent works with a clean slate
     restore_search_dir = backup_dir or "."
     restore_backups(
-        search_dir=restore_search_dir, extension=backup_extension, target_root="."
+        search_dir=restore_search_dir,
+        extension=backup_extension,
+        target_root=".",
+        preserve_metadata=backup_cfg.get("preserve_metadata", True),
+        use_hardlinks=backup_cfg.get("use_hardlinks", False),
     )
 
     # Determine agent settings, allowing CLI overrides
@@ -998,9 +1853,9 @@ def main():
             "safe_mode", True
         )  # Default to True if not in config
 
-    # API Retry Configuration
-    api_retry_config = config.get(
-        "api_retry_config", {"max_retries": 3, "base_retry_delay_seconds": 2}
+    # API Retry Configuration (config.yaml.example names the section "api_retry")
+    api_retry_config = config.get("api_retry_config") or config.get(
+        "api_retry", {"max_retries": 3, "base_retry_delay_seconds": 2}
     )
 
     # Initialize agent
@@ -1031,6 +1886,8 @@ def main():
         logging.error(f"An error occurred during task execution: {e}", exc_info=True)
         print(f"\nAn error occurred during task execution: {e}")
         sys.exit(1)
+    finally:
+        agent.close()
 
 
 if __name__ == "__main__":
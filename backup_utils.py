@@ -1,6 +1,9 @@
 import os
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterator
 
 
 LOGGER = logging.getLogger(__name__)
@@ -10,6 +13,8 @@ def restore_backups(
     search_dir: str = ".",
     extension: str = ".bak",
     target_root: str | None = None,
+    preserve_metadata: bool = True,
+    use_hardlinks: bool = False,
 ) -> None:
     """Restore backups in a directory tree.
 
@@ -24,47 +29,188 @@ def restore_backups(
         Root directory to scan. Defaults to the current working directory.
     extension:
         Backup file extension. Defaults to ``.bak``.
+    preserve_metadata:
+        Copy permission bits and timestamps along with the contents
+        (``shutil.copy2``). When ``False`` only the contents are copied with
+        ``shutil.copyfile``, which skips the extra ``copystat`` syscalls.
+    use_hardlinks:
+        Replace each original with a hard link to its backup instead of a
+        copy, when both are on the same filesystem (otherwise the file is
+        copied). No data is copied, but the two paths then share one file:
+        writing to either one in place changes both, and only replacing a
+        path (e.g. writing a new file and renaming it over) or
+        ``detach_backup`` separates them. Only use this when restored files
+        are not edited in place afterwards by anything other than the file
+        tools, which detach the backup first.
     """
     restore_root = target_root or search_dir
 
-    for root, _, files in os.walk(search_dir):
-        for filename in files:
-            if not filename.endswith(extension):
-                continue
-            backup_path = os.path.join(root, filename)
-            if restore_root != search_dir:
-                rel_path = os.path.relpath(backup_path, search_dir)
-                original_path = os.path.join(restore_root, rel_path[: -len(extension)])
-            else:
-                original_path = os.path.join(root, filename[: -len(extension)])
-            try:
-                os.makedirs(os.path.dirname(original_path), exist_ok=True)
-                shutil.copy2(backup_path, original_path)
-                LOGGER.info("Restored %s from %s", original_path, backup_path)
-            except Exception as exc:  # pragma: no cover - best effort restore
-                LOGGER.warning(
-                    "Failed to restore %s from %s: %s",
-                    original_path,
-                    backup_path,
-                    exc,
-                )
+    pairs = []
+    if restore_root != search_dir:
+        # Paths from os.scandir all start with the search directory followed
+        # by a separator, so swap that prefix for the restore root.
+        search_prefix_len = len(os.path.join(search_dir, ""))
+        restore_prefix = os.path.join(restore_root, "")
+        for backup_path in _iter_backup_files(search_dir, extension):
+            rel_path = backup_path[search_prefix_len:].removesuffix(extension)
+            pairs.append((backup_path, restore_prefix + rel_path))
+    else:
+        for backup_path in _iter_backup_files(search_dir, extension):
+            pairs.append((backup_path, backup_path.removesuffix(extension)))
+    if not pairs:
+        return
+
+    # Create the destination directories up front so the copy workers never
+    # race each other in os.makedirs.
+    for directory in {os.path.dirname(original) for _, original in pairs}:
+        if not directory:
+            continue
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as exc:  # pragma: no cover - reported per file below
+            LOGGER.warning("Failed to create directory %s: %s", directory, exc)
+
+    copy = _copy_function(preserve_metadata)
+    if use_hardlinks and _same_filesystem(search_dir, restore_root):
+        copy = partial(_link_or_copy, fallback=copy)
+    restore_one = partial(_restore_one, copy=copy)
+    if len(pairs) == 1:
+        restore_one(pairs[0])
+        return
+    max_workers = min(32, (os.cpu_count() or 1) * 4, len(pairs))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Consume the iterator so every copy finishes before returning.
+        for _ in executor.map(restore_one, pairs, chunksize=16):
+            pass
+
+
+def _iter_backup_files(search_dir: str, extension: str) -> Iterator[str]:
+    """Yield the paths of files under ``search_dir`` whose names end with ``extension``.
+
+    Uses an explicit ``os.scandir`` stack: ``DirEntry.is_dir`` answers from the
+    directory listing on most platforms, so files are classified without an
+    extra ``stat`` each. Like ``os.walk``, symlinked directories are not
+    followed and unreadable directories are skipped.
+    """
+    stack = [search_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(extension) and not entry.is_dir():
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def _copy_function(preserve_metadata: bool) -> Callable[[str, str], object]:
+    """Return the shutil copy function for the requested metadata handling."""
+    # copyfile uses the kernel's zero-copy path (sendfile) on Linux as well;
+    # copy2 additionally runs copystat on the destination.
+    return shutil.copy2 if preserve_metadata else shutil.copyfile
+
+
+def _same_filesystem(path_a: str, path_b: str) -> bool:
+    """Return whether two existing paths are on the same device."""
+    try:
+        return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+    except OSError:
+        return False
+
+
+def _link_or_copy(
+    backup_path: str, original_path: str, fallback: Callable[[str, str], object]
+) -> None:
+    """Hard-link ``original_path`` to ``backup_path``, copying if linking fails."""
+    try:
+        try:
+            os.unlink(original_path)
+        except FileNotFoundError:
+            pass
+        os.link(backup_path, original_path)
+    except OSError:  # e.g. EXDEV across a mount point, or no link support
+        fallback(backup_path, original_path)
+
+
+def _restore_one(
+    pair: tuple[str, str], copy: Callable[[str, str], object] = shutil.copy2
+) -> None:
+    """Copy one backup over its original, logging instead of raising."""
+    backup_path, original_path = pair
+    try:
+        copy(backup_path, original_path)
+        LOGGER.info("Restored %s from %s", original_path, backup_path)
+    except Exception as exc:  # pragma: no cover - best effort restore
+        LOGGER.warning(
+            "Failed to restore %s from %s: %s",
+            original_path,
+            backup_path,
+            exc,
+        )
 
 
 def create_backup(
     file_path: str,
     extension: str = ".bak",
     backup_dir: str | None = None,
+    preserve_metadata: bool = True,
 ) -> str:
-    """Create a backup of ``file_path`` and return the backup path."""
+    """Create a backup of ``file_path`` and return the backup path.
+
+    With ``preserve_metadata=False`` only the file contents are copied.
+    """
     if not os.path.exists(file_path):
         raise FileNotFoundError(file_path)
 
     if backup_dir:
         os.makedirs(backup_dir, exist_ok=True)
-        backup_path = os.path.join(backup_dir, os.path.basename(file_path) + extension)
-    else:
-        backup_path = file_path + extension
+    backup_path = _backup_path(file_path, extension, backup_dir)
 
-    shutil.copy2(file_path, backup_path)
+    if _is_linked(file_path, backup_path):
+        # Hard-linked by restore_backups(use_hardlinks=True); detach the backup
+        # so the copy (and later writes to file_path) don't touch one inode.
+        os.unlink(backup_path)
+    _copy_function(preserve_metadata)(file_path, backup_path)
     LOGGER.info("Created backup %s", backup_path)
     return backup_path
+
+
+def detach_backup(
+    file_path: str,
+    extension: str = ".bak",
+    backup_dir: str | None = None,
+    preserve_metadata: bool = True,
+) -> bool:
+    """Separate ``file_path`` from its backup if the two are hard-linked.
+
+    ``restore_backups(use_hardlinks=True)`` leaves each original sharing one
+    file with its backup, so writing to the original in place (e.g. appending)
+    would change the backup too. Call this before such a write; the backup is
+    replaced by a copy with the same contents. Returns whether a link was
+    broken.
+    """
+    backup_path = _backup_path(file_path, extension, backup_dir)
+    if not _is_linked(file_path, backup_path):
+        return False
+    os.unlink(backup_path)
+    _copy_function(preserve_metadata)(file_path, backup_path)
+    LOGGER.info("Detached backup %s from %s", backup_path, file_path)
+    return True
+
+
+def _backup_path(file_path: str, extension: str, backup_dir: str | None) -> str:
+    """Return where the backup of ``file_path`` lives."""
+    if backup_dir:
+        return os.path.join(backup_dir, os.path.basename(file_path) + extension)
+    return file_path + extension
+
+
+def _is_linked(file_path: str, backup_path: str) -> bool:
+    """Return whether ``file_path`` and ``backup_path`` are one file on disk."""
+    try:
+        return os.path.samefile(file_path, backup_path)
+    except OSError:  # Either path is missing.
+        return False
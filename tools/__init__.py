@@ -1,24 +1,67 @@
-from tools.apply_patch_tool import ApplyPatchTool
-from tools.base_tool import BaseTool
-from tools.change_directory_tool import ChangeDirectoryTool
-from tools.create_directory_tool import CreateDirectoryTool
-from tools.delete_file_tool import DeleteFileTool
-from tools.execute_command_tool import ExecuteCommandTool
-from tools.get_current_directory_tool import GetCurrentDirectoryTool
-from tools.get_file_metadata_tool import GetFileMetadataTool
-from tools.http_request_tool import HttpRequestTool
-from tools.list_directory_tool import ListDirectoryTool
-from tools.read_file_tool import ReadFileTool
-from tools.search_directory_files_tool import SearchDirectoryFilesTool
-from tools.search_file_content_tool import SearchFileContentTool
-from tools.write_file_tool import WriteFileTool
-from tools.git_tool import GitTool
-from tools.create_backup_tool import CreateBackupTool
-from tools.restore_backups_tool import RestoreBackupsTool
+import importlib
+from typing import List, Type
 
+from tools.base_tool import (
+    BaseTool,
+    Confirmer,
+    confirm_with_input,
+    register_tool,
+    registered_tools,
+)
+
+# Tool classes are imported on first access (PEP 562) so that importing the
+# package, e.g. for BaseTool, does not pull in every tool's dependencies.
+# Maps each class name to the module defining it, in registration order.
+_LAZY = {
+    "ApplyPatchTool": "tools.apply_patch_tool",
+    "ChangeDirectoryTool": "tools.change_directory_tool",
+    "CreateDirectoryTool": "tools.create_directory_tool",
+    "DeleteFileTool": "tools.delete_file_tool",
+    "ExecuteCommandTool": "tools.execute_command_tool",
+    "GetCurrentDirectoryTool": "tools.get_current_directory_tool",
+    "GetFileMetadataTool": "tools.get_file_metadata_tool",
+    "HttpRequestTool": "tools.http_request_tool",
+    "ListDirectoryTool": "tools.list_directory_tool",
+    "ReadFileTool": "tools.read_file_tool",
+    "SearchDirectoryFilesTool": "tools.search_directory_files_tool",
+    "SearchFileContentTool": "tools.search_file_content_tool",
+    "WriteFileTool": "tools.write_file_tool",
+    "GitTool": "tools.git_tool",
+    "CreateBackupTool": "tools.create_backup_tool",
+    "RestoreBackupsTool": "tools.restore_backups_tool",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    cls = getattr(importlib.import_module(module_name), name)
+    globals()[name] = cls
+    return cls
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
+
+def import_all_tools() -> List[Type[BaseTool]]:
+    """Imports every tool module and returns the registered tool classes."""
+    for module_name in _LAZY.values():
+        importlib.import_module(module_name)
+    return registered_tools()
+
+
+# The tool classes are resolved lazily by __getattr__ above.
+# pylint: disable=undefined-all-variable
 __all__ = [
     "ApplyPatchTool",
     "BaseTool",
+    "Confirmer",
+    "confirm_with_input",
+    "register_tool",
+    "registered_tools",
+    "import_all_tools",
     "ChangeDirectoryTool",
     "CreateDirectoryTool",
     "DeleteFileTool",
@@ -35,3 +78,4 @@ __all__ = [
     "CreateBackupTool",
     "RestoreBackupsTool",
 ]
+# pylint: enable=undefined-all-variable
@@ -1,30 +1,396 @@
+import mmap
 import re
 import os
-from typing import Dict, Any, List, Optional
-from .base_tool import BaseTool
+import stat
+import tempfile
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from .base_tool import BaseTool, Confirmer, confirm_with_input, register_tool
+from .pattern_utils import compile_pattern
 from backup_utils import create_backup
 
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # numpy is optional; newline scanning falls back to str.find.
+    np = None
 
-class ApplyPatchTool(BaseTool):
-    def get_name(self) -> str:
-        return "apply_patch"
-
-    def get_description(self) -> str:
-        return "Apply changes to a file using find/replace. The 'find' operation can optionally use regular expressions. Supports a dry_run mode to preview changes."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "file_path": "path/to/file",
-            "changes": [
-                {
-                    "find": "text to find (can be a regex if use_regex is true)",
-                    "replace": "replacement text",
-                    "line_number": "Optional. Line number to apply the change to. If not provided, applies globally.",
-                    "use_regex": "Optional. If true, the 'find' text will be treated as a regular expression. Defaults to false.",
-                }
-            ],
-            "dry_run": "Optional. If true, simulates the changes without writing to the file. Defaults to false.",
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pyahocorasick is optional; batching falls back to re.
+    ahocorasick = None
+
+# Below this size the str.find loop is as fast as handing the buffer to numpy.
+_NUMPY_SCAN_MIN_CHARS = 64 * 1024
+
+# Files at least this large are decoded straight from a memory map, skipping
+# the intermediate bytes copy that read() makes.
+_MMAP_MIN_BYTES = 1024 * 1024
+
+# Fewer simple global replacements than this are applied one str.replace at a time.
+_BATCH_MIN_CHANGES = 4
+
+
+def _line_offsets(content: str) -> List[int]:
+    """Returns the start offset of every line in ``content``."""
+    # Byte offsets only equal character offsets for ASCII text.
+    if np is not None and len(content) >= _NUMPY_SCAN_MIN_CHARS and content.isascii():
+        buf = np.frombuffer(content.encode("ascii"), dtype=np.uint8)
+        return [0] + (np.flatnonzero(buf == 0x0A) + 1).tolist()
+    offsets = [0]
+    find = content.find
+    pos = find("\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = find("\n", pos + 1)
+    return offsets
+
+
+def _line_bounds(content: str, offsets: List[int], line_idx: int) -> Tuple[int, int]:
+    """Returns the start and end offsets of line ``line_idx``, without its newline."""
+    if line_idx + 1 < len(offsets):
+        return offsets[line_idx], offsets[line_idx + 1] - 1
+    return offsets[line_idx], len(content)
+
+
+def _splice_lines(content: str, offsets: List[int], edits: Dict[int, str]) -> str:
+    """Rebuilds ``content`` with the lines in ``edits`` replaced, in one join."""
+    parts = []
+    cursor = 0
+    for line_idx in sorted(edits):
+        start, end = _line_bounds(content, offsets, line_idx)
+        parts.append(content[cursor:start])
+        parts.append(edits[line_idx])
+        cursor = end
+    parts.append(content[cursor:])
+    return "".join(parts)
+
+
+def _replace_plain(content: str, find_text: str, replace_text: str) -> Tuple[str, int]:
+    """Replaces every ``find_text`` in one pass; returns the text and the count."""
+    # When the lengths differ the occurrence count follows from the size change.
+    length_delta = len(find_text) - len(replace_text)
+    if length_delta:
+        new_content = content.replace(find_text, replace_text)
+        return new_content, (len(content) - len(new_content)) // length_delta
+    occurrences = content.count(find_text)
+    if not occurrences:
+        return content, 0
+    return content.replace(find_text, replace_text), occurrences
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """Returns True if an occurrence of ``a`` and one of ``b`` can overlap."""
+    if a in b or b in a:
+        return True
+    return any(
+        a.endswith(b[:n]) or b.endswith(a[:n]) for n in range(1, min(len(a), len(b)))
+    )
+
+
+def _batch_replace(
+    content: str, pairs: List[Tuple[str, str]]
+) -> Optional[Tuple[str, List[int]]]:
+    """
+    Applies several global find/replace pairs to ``content`` in a single pass.
+
+    The result matches applying the pairs one after another with str.replace.
+    Batching is refused (None is returned) unless that is guaranteed: no two
+    find texts may overlap, and no replacement may be empty or contain a
+    character of a later find text, so earlier replacements can neither create
+    nor hide matches for later ones.
+
+    Returns:
+        The new content and the number of occurrences replaced per pair, or
+        None if the pairs have to be applied sequentially.
+    """
+    for j, (find_j, replace_j) in enumerate(pairs):
+        later = pairs[j + 1 :]
+        if later and (not replace_j or any(set(replace_j) & set(f) for f, _ in later)):
+            return None
+        if any(_overlaps(find_j, f) for f, _ in later):
+            return None
+
+    # With no overlaps, the leftmost non-overlapping matches of all find texts
+    # together are exactly the matches each str.replace would have found.
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for idx, (find_text, _) in enumerate(pairs):
+            automaton.add_word(find_text, idx)
+        automaton.make_automaton()
+        matches = (
+            (end + 1 - len(pairs[idx][0]), end + 1, idx)
+            for end, idx in automaton.iter(content)
+        )
+    else:
+        index = {find_text: idx for idx, (find_text, _) in enumerate(pairs)}
+        alternation = compile_pattern("|".join(re.escape(f) for f, _ in pairs))
+        matches = (
+            (m.start(), m.end(), index[m.group()]) for m in alternation.finditer(content)
+        )
+
+    counts = [0] * len(pairs)
+    pieces = []
+    last_end = 0
+    for start, end, idx in matches:
+        if start < last_end:  # A pattern overlapping its own previous match.
+            continue
+        pieces.append(content[last_end:start])
+        pieces.append(pairs[idx][1])
+        counts[idx] += 1
+        last_end = end
+    if last_end == 0:
+        return content, counts
+    pieces.append(content[last_end:])
+    return "".join(pieces), counts
+
+
+class _PatchBuffer:
+    """
+    The text being patched.
+
+    Line-number changes address 'content' through a lazily built index of line
+    start offsets, so no per-line strings are created. Edited lines are kept
+    aside and spliced in with a single join when a global change needs the
+    whole text, or at the end.
+    """
+
+    __slots__ = ("content", "changed", "_offsets", "_edits")
+
+    def __init__(self, content: str):
+        self.content = content
+        # Set as changes apply, so the result needs no full-buffer comparison
+        # with the original text.
+        self.changed = False
+        self._offsets: Optional[List[int]] = None
+        self._edits: Dict[int, str] = {}
+
+    def line_count(self) -> int:
+        if self._offsets is None:
+            self._offsets = _line_offsets(self.content)
+        return len(self._offsets)
+
+    def get_line(self, line_idx: int) -> str:
+        """Returns a line (after line_count() was called), with pending edits."""
+        line = self._edits.get(line_idx)
+        if line is None:
+            start, end = _line_bounds(self.content, self._offsets, line_idx)
+            line = self.content[start:end]
+        return line
+
+    def set_line(self, line_idx: int, new_line: str, old_line: str) -> None:
+        self._edits[line_idx] = new_line
+        self.changed |= new_line != old_line
+
+    def text(self) -> str:
+        """Returns the full text with the pending line edits applied."""
+        if not self._edits:
+            return self.content
+        return _splice_lines(self.content, self._offsets, self._edits)
+
+    def replace_text(self, new_content: str, changed: bool) -> None:
+        """
+        Replaces the whole text. The line index is dropped so line numbers of
+        later changes refer to the new text.
+        """
+        self.content = new_content
+        self._offsets = None
+        self._edits = {}
+        self.changed |= changed
+
+
+# Each change handler applies one change to a _PatchBuffer and returns whether
+# it applied, plus its detail record when 'verbose' is set.
+_ChangeResult = Tuple[bool, Optional[Dict[str, Any]]]
+
+
+def _apply_to_line(
+    buf: _PatchBuffer,
+    i: int,
+    find_text: str,
+    line_number: int,
+    operation_type: str,
+    verbose: bool,
+    substitute: Callable[[str], Tuple[str, bool]],
+) -> _ChangeResult:
+    line_idx = line_number - 1
+    if not 0 <= line_idx < buf.line_count():
+        if not verbose:
+            return False, None
+        return False, {
+            "change_index": i,
+            "success": False,
+            "line_number": line_number,
+            "error": f"Line number {line_number} is out of range (file has {buf.line_count()} lines)",
+            "operation": operation_type,
+        }
+    original_line = buf.get_line(line_idx)
+    new_line_content, applied = substitute(original_line)
+    if not applied:
+        if not verbose:
+            return False, None
+        return False, {
+            "change_index": i,
+            "success": False,
+            "line_number": line_number,
+            "error": f"{operation_type.capitalize()} pattern '{find_text}' not found on line {line_number}",
+            "operation": operation_type,
         }
+    buf.set_line(line_idx, new_line_content, original_line)
+    if not verbose:
+        return True, None
+    return True, {
+        "change_index": i,
+        "success": True,
+        "line_number": line_number,
+        "original_line": original_line,
+        "new_line": new_line_content,
+        "operation": operation_type,
+    }
+
+
+def _line_regex(
+    buf: _PatchBuffer,
+    i: int,
+    find_text: str,
+    replace_text: str,
+    line_number: Optional[int],
+    pattern: Optional["re.Pattern[str]"],
+    verbose: bool,
+) -> _ChangeResult:
+    def substitute(line: str) -> Tuple[str, bool]:
+        new_line, num_replacements = pattern.subn(replace_text, line)
+        return new_line, num_replacements > 0
+
+    return _apply_to_line(buf, i, find_text, line_number, "regex", verbose, substitute)
+
+
+def _line_string(
+    buf: _PatchBuffer,
+    i: int,
+    find_text: str,
+    replace_text: str,
+    line_number: Optional[int],
+    _pattern: Optional["re.Pattern[str]"],
+    verbose: bool,
+) -> _ChangeResult:
+    def substitute(line: str) -> Tuple[str, bool]:
+        # Replace first and check afterwards: a miss returns the line itself,
+        # so the comparison is free and the line is scanned only once.
+        new_line = line.replace(find_text, replace_text)
+        return new_line, new_line != line or (
+            find_text == replace_text and find_text in line
+        )
+
+    return _apply_to_line(buf, i, find_text, line_number, "string", verbose, substitute)
+
+
+def _global_success(i: int, occurrences: int, operation_type: str) -> Dict[str, Any]:
+    return {
+        "change_index": i,
+        "success": True,
+        "occurrences_replaced": occurrences,
+        "global_replacement": True,
+        "operation": operation_type,
+    }
+
+
+def _global_regex(
+    buf: _PatchBuffer,
+    i: int,
+    find_text: str,
+    replace_text: str,
+    _line_number: Optional[int],
+    pattern: Optional["re.Pattern[str]"],
+    verbose: bool,
+) -> _ChangeResult:
+    text = buf.text()
+    new_content, num_replacements = pattern.subn(replace_text, text)
+    if not num_replacements:
+        if not verbose:
+            return False, None
+        return False, {
+            "change_index": i,
+            "success": False,
+            "error": f"Regex pattern '{find_text}' not found in file (global search)",
+            "operation": "regex",
+        }
+    # Unequal lengths make this comparison instant.
+    buf.replace_text(new_content, new_content != text)
+    return True, _global_success(i, num_replacements, "regex") if verbose else None
+
+
+def _global_string(
+    buf: _PatchBuffer,
+    i: int,
+    find_text: str,
+    replace_text: str,
+    _line_number: Optional[int],
+    _pattern: Optional["re.Pattern[str]"],
+    verbose: bool,
+) -> _ChangeResult:
+    new_content, occurrences = _replace_plain(buf.text(), find_text, replace_text)
+    if not occurrences:
+        if not verbose:
+            return False, None
+        return False, {
+            "change_index": i,
+            "success": False,
+            "error": f"Text '{find_text}' not found in file (global search)",
+            "operation": "string",
+        }
+    buf.replace_text(new_content, find_text != replace_text)
+    return True, _global_success(i, occurrences, "string") if verbose else None
+
+
+# Keyed on (has line_number, use_regex).
+_CHANGE_HANDLERS = {
+    (True, True): _line_regex,
+    (True, False): _line_string,
+    (False, True): _global_regex,
+    (False, False): _global_string,
+}
+
+
+def _atomic_write(file_path: str, data: bytes) -> None:
+    """Replaces ``file_path`` with ``data`` via a temp file and os.replace().
+
+    The file's permission bits are carried over and symlinks are written
+    through, so readers never observe a partially written file.
+    """
+    target = os.path.realpath(file_path)
+    mode = stat.S_IMODE(os.stat(target).st_mode)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(target), prefix=".patch-", suffix=".tmp"
+    )
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+            os.fchmod(fd, mode)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@register_tool
+class ApplyPatchTool(BaseTool):
+    NAME = "apply_patch"
+    DESCRIPTION = "Apply changes to a file using find/replace. The 'find' operation can optionally use regular expressions. Supports a dry_run mode to preview changes."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "file_path": "path/to/file",
+        "changes": [
+            {
+                "find": "text to find (can be a regex if use_regex is true)",
+                "replace": "replacement text",
+                "line_number": "Optional. Line number to apply the change to. If not provided, applies globally.",
+                "use_regex": "Optional. If true, the 'find' text will be treated as a regular expression. Defaults to false.",
+            }
+        ],
+        "dry_run": "Optional. If true, simulates the changes without writing to the file. Defaults to false.",
+    }
 
     def execute(
         self,
@@ -33,19 +399,27 @@ class ApplyPatchTool(BaseTool):
         dry_run: bool = False,
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
+        confirm: Optional[Confirmer] = None,
+        verbose: Optional[bool] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """
         Apply a patch to a file using find/replace operations, with optional regex for find.
         Supports a dry_run mode to simulate changes without modifying the file.
+
+        Per-change results are reported in 'changes_applied_details' when
+        ``verbose`` is true, which it is by default for calls carrying a
+        trace_id (i.e. from the agent). Otherwise that list is left empty and
+        only the 'successful_changes'/'failed_changes' counts are filled in.
         """
         # trace_id is available here if needed for logging within the tool
+        if verbose is None:
+            verbose = trace_id is not None
         try:
             if agent_safe_mode and os.path.exists(file_path) and not dry_run:
-                confirm = input(
+                if not (confirm or confirm_with_input)(
                     f"SAFE MODE: Confirm applying changes to '{file_path}'? [y/N]: "
-                )
-                if confirm.lower() not in ["y", "yes"]:
+                ):
                     return {
                         "success": False,
                         "error": "Patch application not confirmed by user.",
@@ -54,152 +428,102 @@ class ApplyPatchTool(BaseTool):
             if not os.path.exists(file_path):
                 return {"success": False, "error": f"File not found: {file_path}"}
 
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            # Read raw bytes and decode once, skipping text-mode newline
+            # translation. CRLF files are normalised to "\n" for matching and
+            # written back with CRLF endings.
+            with open(file_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size >= _MMAP_MIN_BYTES:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        content = str(mm, "utf-8")
+                        has_crlf = mm.find(b"\r\n") != -1
+                else:
+                    raw = f.read()
+                    content = raw.decode("utf-8")
+                    has_crlf = b"\r\n" in raw
+            newline = "\r\n" if has_crlf else "\n"
+            if newline != "\n":
+                content = content.replace("\r\n", "\n")
 
-            original_content = content
-            lines = content.split("\n")
-            changes_applied_details = []  # Renamed for clarity as per requirements
+            buf = _PatchBuffer(content)
+            successful_individual_changes = 0
+            # Every change yields exactly one detail record, stored at its index.
+            changes_applied_details: List[Optional[Dict[str, Any]]] = (
+                [None] * len(changes) if verbose else []
+            )
+
+            # Patches made only of plain global replacements skip the generic
+            # loop: a single change (the usual shape) is one direct replace,
+            # and many are applied in one scan of the buffer when doing so
+            # cannot change the result.
+            remaining_changes = changes
+            batched = None
+            if (
+                len(changes) == 1 or len(changes) >= _BATCH_MIN_CHANGES
+            ) and all(
+                change.get("find")
+                and isinstance(change["find"], str)
+                and isinstance(change.get("replace", ""), str)
+                and change.get("line_number") is None
+                and not change.get("use_regex", False)
+                for change in changes
+            ):
+                if len(changes) == 1:
+                    new_content, occurrences = _replace_plain(
+                        content, changes[0]["find"], changes[0].get("replace", "")
+                    )
+                    batched = (new_content, [occurrences])
+                else:
+                    batched = _batch_replace(
+                        content,
+                        [(change["find"], change.get("replace", "")) for change in changes],
+                    )
+                if batched is not None:
+                    new_content, counts = batched
+                    changed = False
+                    for i, (change, occurrences) in enumerate(zip(changes, counts)):
+                        if occurrences:
+                            if verbose:
+                                changes_applied_details[i] = _global_success(
+                                    i, occurrences, "string"
+                                )
+                            successful_individual_changes += 1
+                            changed |= change["find"] != change.get("replace", "")
+                        elif verbose:
+                            changes_applied_details[i] = {
+                                "change_index": i,
+                                "success": False,
+                                "error": f"Text '{change['find']}' not found in file (global search)",
+                                "operation": "string",
+                            }
+                    buf.replace_text(new_content, changed)
+                    remaining_changes = []
 
-            for i, change in enumerate(changes):
+            for i, change in enumerate(remaining_changes):
                 find_text = change.get("find", "")
                 replace_text = change.get("replace", "")
                 line_number = change.get("line_number")
                 use_regex = change.get("use_regex", False)
 
                 if not find_text:
-                    changes_applied_details.append(
-                        {
+                    if verbose:
+                        changes_applied_details[i] = {
                             "change_index": i,
                             "success": False,
                             "error": "No 'find' text specified",
                         }
-                    )
                     continue
 
-                applied_this_change = False
                 operation_type = "regex" if use_regex else "string"
-
+                handler = _CHANGE_HANDLERS[line_number is not None, bool(use_regex)]
                 try:
-                    if line_number is not None:
-                        line_idx = line_number - 1
-                        if 0 <= line_idx < len(lines):
-                            original_line = lines[line_idx]
-                            new_line_content = lines[
-                                line_idx
-                            ]  # Initialize with current line content
-
-                            if use_regex:
-                                new_line_content, num_replacements = re.subn(
-                                    find_text, replace_text, new_line_content
-                                )
-                                if num_replacements > 0:
-                                    lines[line_idx] = new_line_content
-                                    applied_this_change = True
-                            else:
-                                if find_text in new_line_content:
-                                    new_line_content = new_line_content.replace(
-                                        find_text, replace_text
-                                    )
-                                    lines[line_idx] = new_line_content
-                                    applied_this_change = True
-
-                            if applied_this_change:
-                                changes_applied_details.append(
-                                    {
-                                        "change_index": i,
-                                        "success": True,
-                                        "line_number": line_number,
-                                        "original_line": original_line,
-                                        "new_line": lines[line_idx],
-                                        "operation": operation_type,
-                                    }
-                                )
-                            else:
-                                changes_applied_details.append(
-                                    {
-                                        "change_index": i,
-                                        "success": False,
-                                        "line_number": line_number,
-                                        "error": f"{operation_type.capitalize()} pattern '{find_text}' not found on line {line_number}",
-                                        "operation": operation_type,
-                                    }
-                                )
-                        else:
-                            changes_applied_details.append(
-                                {
-                                    "change_index": i,
-                                    "success": False,
-                                    "line_number": line_number,
-                                    "error": f"Line number {line_number} is out of range (file has {len(lines)} lines)",
-                                    "operation": operation_type,
-                                }
-                            )
-                    else:  # Global replacement
-                        # For global changes, we need to apply them to the 'content' string
-                        # and then re-split into lines to keep 'lines' in sync.
-                        # This ensures line numbers for subsequent line-specific changes are correct.
-                        temp_content = "\n".join(
-                            lines
-                        )  # Use current state of lines for global search
-
-                        if use_regex:
-                            new_content, num_replacements = re.subn(
-                                find_text, replace_text, temp_content
-                            )
-                            if num_replacements > 0:
-                                lines = new_content.split(
-                                    "\n"
-                                )  # Update lines array after global regex change
-                                changes_applied_details.append(
-                                    {
-                                        "change_index": i,
-                                        "success": True,
-                                        "occurrences_replaced": num_replacements,
-                                        "global_replacement": True,
-                                        "operation": operation_type,
-                                    }
-                                )
-                                applied_this_change = True
-                            else:
-                                changes_applied_details.append(
-                                    {
-                                        "change_index": i,
-                                        "success": False,
-                                        "error": f"{operation_type.capitalize()} pattern '{find_text}' not found in file (global search)",
-                                        "operation": operation_type,
-                                    }
-                                )
-                        else:  # Simple string global replacement
-                            if find_text in temp_content:
-                                occurrences = temp_content.count(find_text)
-                                new_content = temp_content.replace(
-                                    find_text, replace_text
-                                )
-                                lines = new_content.split(
-                                    "\n"
-                                )  # Update lines array after global string change
-                                changes_applied_details.append(
-                                    {
-                                        "change_index": i,
-                                        "success": True,
-                                        "occurrences_replaced": occurrences,
-                                        "global_replacement": True,
-                                        "operation": operation_type,
-                                    }
-                                )
-                                applied_this_change = True
-                            else:
-                                changes_applied_details.append(
-                                    {
-                                        "change_index": i,
-                                        "success": False,
-                                        "error": f"Text '{find_text}' not found in file (global search)",
-                                        "operation": operation_type,
-                                    }
-                                )
+                    # Compile once for either branch; re.error is reported below.
+                    pattern = compile_pattern(find_text) if use_regex else None
+                    applied, detail = handler(
+                        buf, i, find_text, replace_text, line_number, pattern, verbose
+                    )
                 except re.error as e_regex:
-                    changes_applied_details.append(
+                    applied = False
+                    detail = (
                         {
                             "change_index": i,
                             "success": False,
@@ -207,11 +531,14 @@ class ApplyPatchTool(BaseTool):
                             "error": f"Invalid regex pattern '{find_text}': {str(e_regex)}",
                             "operation": "regex",
                         }
+                        if verbose
+                        else None
                     )
                 except (
                     Exception
                 ) as e_line:  # Catch other unexpected errors during change application
-                    changes_applied_details.append(
+                    applied = False
+                    detail = (
                         {
                             "change_index": i,
                             "success": False,
@@ -219,34 +546,41 @@ class ApplyPatchTool(BaseTool):
                             "error": f"Error applying {operation_type} change: {str(e_line)}",
                             "operation": operation_type,
                         }
+                        if verbose
+                        else None
                     )
+                successful_individual_changes += applied
+                if verbose:
+                    changes_applied_details[i] = detail
 
-            modified_content = "\n".join(lines)
+            # The flag rules out most no-op patches cheaply; changes that undo
+            # each other still need the text comparison.
+            modified_content = buf.text() if buf.changed else content
+            content_changed = buf.changed and modified_content != content
 
             config = kwargs.get("config", {})
             backup_cfg = config.get("backup", {})
             backup_ext = backup_cfg.get("extension", ".bak")
             backup_dir = backup_cfg.get("directory")
+            preserve_metadata = backup_cfg.get("preserve_metadata", True)
 
             file_was_modified = False
-            if modified_content != original_content:
+            if content_changed:
                 if not dry_run:  # Only write if not in dry run mode
                     if os.path.exists(file_path):
                         create_backup(
                             file_path,
                             extension=backup_ext,
                             backup_dir=backup_dir,
+                            preserve_metadata=preserve_metadata,
                         )
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(modified_content)
+                    if newline != "\n":
+                        modified_content = modified_content.replace("\n", newline)
+                    _atomic_write(file_path, modified_content.encode("utf-8"))
                     file_was_modified = True
                 else:
                     file_was_modified = True  # In dry run, we consider it modified if changes would have occurred
 
-            successful_individual_changes = sum(
-                1 for chg_detail in changes_applied_details if chg_detail.get("success")
-            )
-
             message_prefix = "Dry run: " if dry_run else ""
             message_suffix = " (no changes written to file)" if dry_run else ""
 
@@ -254,6 +588,8 @@ class ApplyPatchTool(BaseTool):
                 "success": True,
                 "message": f"{message_prefix}Processed {len(changes)} changes for {file_path}. {successful_individual_changes} individual changes would have been applied successfully{message_suffix}.",
                 "changes_applied_details": changes_applied_details,
+                "successful_changes": successful_individual_changes,
+                "failed_changes": len(changes) - successful_individual_changes,
                 "file_modified": file_was_modified,
             }
         except Exception as e:
@@ -1,22 +1,45 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Type
+
+# Asks the user to approve an action described by the prompt; True approves.
+Confirmer = Callable[[str], bool]
+
+
+def confirm_with_input(prompt: str) -> bool:
+    """Default Confirmer: asks on stdin. Only "y"/"yes" approve; EOF declines."""
+    try:
+        answer = input(prompt)
+    except EOFError:
+        return False
+    return answer.strip().lower() in ("y", "yes")
 
 
 class BaseTool(ABC):
-    @abstractmethod
+    # Whether the tool only reads state, so calls to it can run concurrently
+    # with each other. Tools that modify anything must leave this False.
+    is_concurrency_safe: bool = False
+    # Whether a successful result may be reused for an identical call until a
+    # tool that is not concurrency-safe runs. Implies is_concurrency_safe.
+    is_cacheable: bool = False
+
+    # Subclasses describe themselves with class constants, so the getters
+    # below return shared objects instead of building new ones per call.
+    # PARAMS_SCHEMA is shared by all instances and must not be mutated.
+    NAME: str
+    DESCRIPTION: str
+    PARAMS_SCHEMA: Dict[str, Any] = {}
+
     def get_name(self) -> str:
         """Returns the callable name of the tool."""
-        pass
+        return self.NAME
 
-    @abstractmethod
     def get_description(self) -> str:
         """Returns a description of the tool for the LLM."""
-        pass
+        return self.DESCRIPTION
 
-    @abstractmethod
     def get_parameters_schema(self) -> Dict[str, Any]:
         """Returns a dictionary representing a simplified schema of parameters."""
-        pass
+        return self.PARAMS_SCHEMA
 
     @abstractmethod
     def execute(
@@ -28,9 +51,27 @@ class BaseTool(ABC):
         Args:
             agent_safe_mode (bool): Indicates if the agent is in safe mode.
             trace_id (Optional[str]): An optional trace ID for logging/tracking.
+            confirm (Optional[Confirmer]): Passed as a keyword argument to tools
+                that ask before acting in safe mode; defaults to
+                confirm_with_input.
             **kwargs: Tool-specific parameters.
 
         Returns:
             Dict[str, Any]: A dictionary containing the result of the tool's execution.
         """
         pass
+
+
+_REGISTRY: List[Type[BaseTool]] = []
+
+
+def register_tool(cls: Type[BaseTool]) -> Type[BaseTool]:
+    """Class decorator that makes a tool available to the agent."""
+    if cls not in _REGISTRY:
+        _REGISTRY.append(cls)
+    return cls
+
+
+def registered_tools() -> List[Type[BaseTool]]:
+    """Returns the registered tool classes in registration order."""
+    return list(_REGISTRY)
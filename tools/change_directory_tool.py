@@ -1,17 +1,13 @@
 import os
 from typing import Dict, Any, Optional
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
 
 
+@register_tool
 class ChangeDirectoryTool(BaseTool):
-    def get_name(self) -> str:
-        return "change_directory"
-
-    def get_description(self) -> str:
-        return "Change current working directory."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {"directory_path": "path/to/directory"}
+    NAME = "change_directory"
+    DESCRIPTION = "Change current working directory."
+    PARAMS_SCHEMA: Dict[str, Any] = {"directory_path": "path/to/directory"}
 
     def execute(
         self,
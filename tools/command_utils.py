@@ -0,0 +1,180 @@
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import IO, List, Optional, Sequence
+
+# Output kept per stream; a runaway command only has its last bytes captured.
+MAX_OUTPUT_BYTES = 1024 * 1024
+_READ_CHUNK = 64 * 1024
+# After a timeout kill, how long to wait for the output pipes to close.
+_KILL_GRACE_SECONDS = 1.0
+
+# Characters that need /bin/sh to interpret them: pipes, redirects, command
+# separators, substitutions, globs, home expansion and comments.
+_SHELL_CHARS = frozenset("|&;<>()$`*?[]{}~#!\n\r")
+# Words that only exist as shell builtins or keywords.
+_SHELL_BUILTINS = frozenset(
+    {
+        ".",
+        "alias",
+        "cd",
+        "eval",
+        "exec",
+        "exit",
+        "export",
+        "for",
+        "if",
+        "set",
+        "source",
+        "ulimit",
+        "umask",
+        "unset",
+        "while",
+    }
+)
+
+
+def split_command(command: str) -> Optional[List[str]]:
+    """
+    Splits a simple command line into argv, or returns None if it needs a shell.
+
+    A command is simple when it has no shell metacharacters, does not start
+    with a variable assignment or builtin, and parses with shlex.
+    """
+    if not command or not _SHELL_CHARS.isdisjoint(command):
+        return None
+    try:
+        args = shlex.split(command)
+    except ValueError:  # e.g. unbalanced quotes; let the shell report it.
+        return None
+    if not args or "=" in args[0] or args[0] in _SHELL_BUILTINS:
+        return None
+    return args
+
+
+class _TailReader(threading.Thread):
+    """Drains a pipe in the background, keeping only its last ``cap`` bytes."""
+
+    def __init__(self, pipe: IO[bytes], cap: int):
+        super().__init__(daemon=True)
+        self._pipe = pipe
+        self._cap = cap
+        self._chunks: deque = deque()
+        self._kept = 0
+        self.dropped = 0
+
+    def run(self) -> None:
+        chunks = self._chunks
+        read = self._pipe.read1
+        with self._pipe:
+            while chunk := read(_READ_CHUNK):
+                chunks.append(chunk)
+                self._kept += len(chunk)
+                while self._kept - len(chunks[0]) >= self._cap:
+                    self._kept -= len(chunks[0])
+                    self.dropped += len(chunks.popleft())
+
+    def result(self) -> bytes:
+        data = b"".join(self._chunks)
+        if len(data) > self._cap:
+            self.dropped += len(data) - self._cap
+            data = data[-self._cap :]
+        if self.dropped:
+            data = b"[... %d bytes of output truncated ...]\n" % self.dropped + data
+        return data
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    """Kills the command together with everything it started in its session."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):  # e.g. Windows
+        process.kill()
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _run_capped(
+    args, shell: bool, timeout: Optional[float], cwd: Optional[str], cap: int
+) -> subprocess.CompletedProcess:
+    """subprocess.run(capture_output=True) that keeps at most ``cap`` bytes per stream."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    # A session of its own lets a timeout kill grandchildren too (e.g. the
+    # left side of a pipeline), which would otherwise keep the pipes open.
+    process = subprocess.Popen(
+        args,
+        shell=shell,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    readers = [_TailReader(process.stdout, cap), _TailReader(process.stderr, cap)]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+        # Background children may still hold the pipes after the command
+        # exits; they get whatever is left of the timeout.
+        for reader in readers:
+            reader.join(_remaining(deadline))
+        if any(reader.is_alive() for reader in readers):
+            raise subprocess.TimeoutExpired(args, timeout)
+    except subprocess.TimeoutExpired:
+        _kill_group(process)
+        process.wait()
+        # The readers close the pipes once the killed processes are gone. One
+        # that escaped into another session can keep a pipe open; its daemon
+        # reader is abandoned rather than waited for, since closing a pipe
+        # under a thread blocked reading it is not safe.
+        grace = time.monotonic() + _KILL_GRACE_SECONDS
+        for reader in readers:
+            reader.join(_remaining(grace))
+        raise
+    stdout, stderr = (reader.result() for reader in readers)
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr)
+
+
+def decode_output(data: bytes) -> str:
+    """Decodes captured output once, translating newlines like text mode does."""
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def run_command(
+    command: str,
+    prefix: Sequence[str] = (),
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    max_output_bytes: int = MAX_OUTPUT_BYTES,
+) -> subprocess.CompletedProcess:
+    """
+    Runs ``command`` (after the argv ``prefix``, e.g. ``["git"]``) and captures
+    its output as bytes, keeping only the last ``max_output_bytes`` of each
+    stream behind a truncation marker.
+
+    Simple commands are executed directly, saving the /bin/sh process; anything
+    else, or a program that cannot be found, goes through the shell so that
+    behaviour and error messages match a shell invocation.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command runs longer than ``timeout``.
+    """
+    args = split_command(command)
+    if args is not None:
+        try:
+            return _run_capped(
+                [*prefix, *args], False, timeout, cwd, max_output_bytes
+            )
+        except FileNotFoundError:
+            pass  # Not a program on PATH (or a bad cwd); ask the shell.
+    shell_command = " ".join([*map(shlex.quote, prefix), command])
+    return _run_capped(shell_command, True, timeout, cwd, max_output_bytes)
@@ -1,19 +1,15 @@
 import os
 from typing import Dict, Any, Optional
 
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
 from backup_utils import create_backup
 
 
+@register_tool
 class CreateBackupTool(BaseTool):
-    def get_name(self) -> str:
-        return "create_backup"
-
-    def get_description(self) -> str:
-        return "Create a backup of a file using the configured extension and directory."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {"file_path": "path/to/file"}
+    NAME = "create_backup"
+    DESCRIPTION = "Create a backup of a file using the configured extension and directory."
+    PARAMS_SCHEMA: Dict[str, Any] = {"file_path": "path/to/file"}
 
     def execute(
         self,
@@ -26,11 +22,15 @@ class CreateBackupTool(BaseTool):
         backup_cfg = config.get("backup", {})
         backup_ext = backup_cfg.get("extension", ".bak")
         backup_dir = backup_cfg.get("directory")
+        preserve_metadata = backup_cfg.get("preserve_metadata", True)
         try:
             if not os.path.exists(file_path):
                 return {"success": False, "error": f"File not found: {file_path}"}
             backup_path = create_backup(
-                file_path, extension=backup_ext, backup_dir=backup_dir
+                file_path,
+                extension=backup_ext,
+                backup_dir=backup_dir,
+                preserve_metadata=preserve_metadata,
             )
             return {"success": True, "message": f"Backup created at {backup_path}"}
         except Exception as exc:
@@ -1,35 +1,29 @@
 import os
 from typing import Dict, Any, Optional
-from .base_tool import BaseTool
+from .base_tool import BaseTool, Confirmer, confirm_with_input, register_tool
 
 
+@register_tool
 class CreateDirectoryTool(BaseTool):
-    def get_name(self) -> str:
-        return "create_directory"
-
-    def get_description(self) -> str:
-        return "Create a new directory."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {"directory_path": "path/to/new/directory"}
+    NAME = "create_directory"
+    DESCRIPTION = "Create a new directory."
+    PARAMS_SCHEMA: Dict[str, Any] = {"directory_path": "path/to/new/directory"}
 
     def execute(
         self,
         directory_path: str,
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
+        confirm: Optional[Confirmer] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         # trace_id is available here if needed for logging within the tool
         try:
             # Safe mode check for directory creation
             if agent_safe_mode:
-                user_confirmation = (
-                    input(f"Safe Mode: Create directory '{directory_path}'? (yes/no): ")
-                    .strip()
-                    .lower()
-                )
-                if user_confirmation != "yes":
+                if not (confirm or confirm_with_input)(
+                    f"Safe Mode: Create directory '{directory_path}'? (yes/no): "
+                ):
                     return {
                         "success": False,
                         "message": "Directory creation cancelled by user in safe mode.",
@@ -1,21 +1,18 @@
 import subprocess
 from typing import Dict, Any, Optional
-from .base_tool import BaseTool
+from .base_tool import BaseTool, Confirmer, confirm_with_input, register_tool
+from .command_utils import decode_output, run_command
 
 
+@register_tool
 class ExecuteCommandTool(BaseTool):
-    def get_name(self) -> str:
-        return "execute_command"
-
-    def get_description(self) -> str:
-        return "Run terminal/shell commands. Supports optional timeout_seconds and working_directory parameters."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "command": "command to execute",
-            "timeout_seconds": "Optional. Maximum time in seconds for the command to run. Defaults to 30 seconds if not provided.",
-            "working_directory": "Optional. Path to the directory where the command should be executed. Defaults to the agent's current working directory if not provided.",
-        }
+    NAME = "execute_command"
+    DESCRIPTION = "Run terminal/shell commands. Supports optional timeout_seconds and working_directory parameters."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "command": "command to execute",
+        "timeout_seconds": "Optional. Maximum time in seconds for the command to run. Defaults to 30 seconds if not provided.",
+        "working_directory": "Optional. Path to the directory where the command should be executed. Defaults to the agent's current working directory if not provided.",
+    }
 
     def execute(
         self,
@@ -24,15 +21,15 @@ class ExecuteCommandTool(BaseTool):
         working_directory: Optional[str] = None,
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
+        confirm: Optional[Confirmer] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """Execute a shell command."""
         # trace_id is available here if needed for logging within the tool
         if agent_safe_mode:
-            confirm = input(
+            if not (confirm or confirm_with_input)(
                 f"SAFE MODE: Confirm execution of command: '{command}'? [y/N]: "
-            )
-            if confirm.lower() not in ["y", "yes"]:
+            ):
                 return {
                     "success": False,
                     "error": "Command execution not confirmed by user.",
@@ -40,18 +37,13 @@ class ExecuteCommandTool(BaseTool):
 
         effective_timeout = timeout_seconds if timeout_seconds is not None else 30
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=effective_timeout,
-                cwd=working_directory,
+            result = run_command(
+                command, timeout=effective_timeout, cwd=working_directory
             )
             return {
                 "success": True,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
+                "stdout": decode_output(result.stdout),
+                "stderr": decode_output(result.stderr),
                 "return_code": result.returncode,
             }
         except subprocess.TimeoutExpired:
@@ -1,17 +1,16 @@
 import os
 from typing import Dict, Any, Optional
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
 
 
+@register_tool
 class GetCurrentDirectoryTool(BaseTool):
-    def get_name(self) -> str:
-        return "get_current_directory"
+    is_concurrency_safe = True
+    is_cacheable = True
 
-    def get_description(self) -> str:
-        return "Get current working directory."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {}  # No parameters
+    NAME = "get_current_directory"
+    DESCRIPTION = "Get current working directory."
+    PARAMS_SCHEMA: Dict[str, Any] = {}
 
     def execute(
         self, agent_safe_mode: bool = False, trace_id: Optional[str] = None, **kwargs
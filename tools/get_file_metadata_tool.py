@@ -3,27 +3,26 @@ import stat
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
 
 
+@register_tool
 class GetFileMetadataTool(BaseTool):
-    def get_name(self) -> str:
-        return "get_file_metadata"
+    is_concurrency_safe = True
+    is_cacheable = True
 
-    def get_description(self) -> str:
-        return "Get metadata for a specified file or directory (e.g., size, type, modification date)."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "The path to the file or directory.",
-                }
-            },
-            "required": ["path"],
-        }
+    NAME = "get_file_metadata"
+    DESCRIPTION = "Get metadata for a specified file or directory (e.g., size, type, modification date)."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "The path to the file or directory.",
+            }
+        },
+        "required": ["path"],
+    }
 
     def execute(
         self,
@@ -34,19 +33,19 @@ class GetFileMetadataTool(BaseTool):
     ) -> Dict[str, Any]:
         # trace_id is available here if needed for logging within the tool
         # This tool is not destructive.
-        if not os.path.exists(path):
-            return {"success": True, "metadata": {"path": path, "exists": False}}
-
         try:
-            stat_info = os.stat(path)
-            file_type = "unknown"
-            if os.path.isfile(path):
+            # One stat call answers existence and type.
+            try:
+                stat_info = os.stat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                return {"success": True, "metadata": {"path": path, "exists": False}}
+            mode = stat_info.st_mode
+            if stat.S_ISREG(mode):
                 file_type = "file"
-            elif os.path.isdir(path):
+            elif stat.S_ISDIR(mode):
                 file_type = "directory"
             else:
-                # This case should ideally not be reached if os.path.exists is true
-                # and it's not a file or directory (e.g. broken symlink on some OS)
+                # Sockets, FIFOs, device nodes and the like.
                 file_type = "other"
 
             metadata = {
@@ -60,7 +59,7 @@ class GetFileMetadataTool(BaseTool):
                 "created_at_or_changed_at_iso8601": datetime.fromtimestamp(
                     stat_info.st_ctime
                 ).isoformat(),
-                "permissions_octal": oct(stat.S_IMODE(stat_info.st_mode)),
+                "permissions_octal": oct(stat.S_IMODE(mode)),
             }
             return {"success": True, "metadata": metadata}
         except PermissionError:
@@ -1,40 +1,26 @@
-import subprocess
 from typing import Dict, Any, Optional
-from tools.base_tool import BaseTool
+from tools.base_tool import BaseTool, register_tool
+from tools.command_utils import decode_output, run_command
 
 
+@register_tool
 class GitTool(BaseTool):
     """
     A tool to execute basic Git commands.
     """
 
-    def get_name(self) -> str:
-        """
-        Returns the callable name of the tool.
-        """
-        return "git_tool"
-
-    def get_description(self) -> str:
-        """
-        Returns a description of the tool for the LLM.
-        Warns about security implications of executing arbitrary commands.
-        """
-        return (
-            "Executes basic Git commands. "
-            "WARNING: The 'command' input is directly passed to subprocess.run with shell=True. "
-            "Ensure the input is trusted to avoid potential security vulnerabilities."
-        )
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        """
-        Returns a dictionary representing the simplified schema of parameters for the GitTool.
-        """
-        return {
-            "command": {
-                "type": "string",
-                "description": "The Git command to execute (e.g., 'status', 'add .', 'commit -m \"message\"').",
-            }
+    NAME = "git_tool"
+    DESCRIPTION = (
+        "Executes basic Git commands. "
+        "WARNING: The 'command' input is run through the shell when it contains shell syntax. "
+        "Ensure the input is trusted to avoid potential security vulnerabilities."
+    )
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "command": {
+            "type": "string",
+            "description": "The Git command to execute (e.g., 'status', 'add .', 'commit -m \"message\"').",
         }
+    }
 
     def execute(
         self,
@@ -43,7 +29,7 @@ class GitTool(BaseTool):
         trace_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
-        Executes the given Git command using subprocess.run.
+        Executes the given Git command, without a shell when it is a plain argument list.
 
         Args:
             command (str): The Git command to execute.
@@ -55,25 +41,21 @@ class GitTool(BaseTool):
                             Includes success status, command, stdout, stderr, return code, and error message.
         """
         try:
-            # Execute the Git command
-            result = subprocess.run(
-                f"git {command}",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,  # Do not raise an exception for non-zero exit codes
-            )
+            # Execute the Git command; non-zero exit codes are reported, not raised.
+            result = run_command(command, prefix=("git",))
+            stdout = decode_output(result.stdout).strip()
+            stderr = decode_output(result.stderr).strip()
 
             success = result.returncode == 0
             error_message = None
             if not success and result.stderr:
-                error_message = result.stderr.strip()
+                error_message = stderr
 
             return {
                 "success": success,
                 "command": command,
-                "stdout": result.stdout.strip(),
-                "stderr": result.stderr.strip(),
+                "stdout": stdout,
+                "stderr": stderr,
                 "return_code": result.returncode,
                 "error_message": error_message,
             }
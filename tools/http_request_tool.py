@@ -1,62 +1,134 @@
 import requests
+import http.cookiejar
 import json
+import threading
 from typing import Dict, Any, Optional
 
-from .base_tool import BaseTool
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from .base_tool import BaseTool, register_tool
 
+try:
+    import orjson  # type: ignore
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib decoder.
+    _json_loads = json.loads
+
+# Connections kept per host, and requests allowed in flight at once. Keeping the
+# two equal means a burst of parallel tool calls never opens connections that
+# the pool would have to discard afterwards.
+_MAX_IN_FLIGHT = 20
+# Bodies are read up to this many bytes unless the caller asks otherwise.
+DEFAULT_MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
+# Content types whose bodies are decoded and returned as text. Responses
+# without a Content-Type are treated as text too.
+_TEXT_TYPE_PREFIXES = ("text/", "application/json", "application/xml")
+_TEXT_TYPE_SUFFIXES = ("+json", "+xml")
+_TEXT_TYPES = frozenset(
+    {
+        "application/javascript",
+        "application/x-www-form-urlencoded",
+        "application/x-ndjson",
+    }
+)
+
+
+def _is_textual(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        not media_type
+        or media_type.startswith(_TEXT_TYPE_PREFIXES)
+        or media_type.endswith(_TEXT_TYPE_SUFFIXES)
+        or media_type in _TEXT_TYPES
+    )
+
+
+@register_tool
 class HttpRequestTool(BaseTool):
     """
     A tool to perform HTTP requests.
     """
 
-    def get_name(self) -> str:
-        """
-        Returns the name of the tool.
-        """
-        return "http_request"
+    is_concurrency_safe = True
 
-    def get_description(self) -> str:
-        """
-        Returns a description of the tool.
-        """
-        return "Perform an HTTP request to a specified URL. Supports GET, POST, PUT, DELETE methods and custom headers/body."
+    # Shared by all calls so connections (and TLS sessions) to a host are reused.
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+    _in_flight = threading.BoundedSemaphore(_MAX_IN_FLIGHT)
 
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        """
-        Returns the schema for the tool's parameters.
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "url": {
-                    "type": "string",
-                    "description": "The URL to make the request to.",
-                },
-                "method": {
-                    "type": "string",
-                    "description": "Optional. The HTTP method to use (GET, POST, PUT, DELETE, etc.). Defaults to GET.",
-                },
-                "headers": {
-                    "type": "object",
-                    "description": "Optional. A dictionary of HTTP headers to send.",
-                    "additionalProperties": {"type": "string"},
-                },
-                "json_body": {
-                    "type": "object",
-                    "description": "Optional. A JSON serializable dictionary to send as the request body (for POST, PUT, etc.). If provided, 'Content-Type: application/json' header will be added automatically if not present.",
-                },
-                "data_body": {
-                    "type": "string",
-                    "description": "Optional. A string to send as the raw request body. Use this for non-JSON bodies.",
-                },
-                "timeout_seconds": {
-                    "type": "integer",
-                    "description": "Optional. Maximum time in seconds to wait for a response. Defaults to 10 seconds.",
-                },
+    NAME = "http_request"
+    DESCRIPTION = "Perform an HTTP request to a specified URL. Supports GET, POST, PUT, DELETE methods and custom headers/body."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "url": {
+                "type": "string",
+                "description": "The URL to make the request to.",
+            },
+            "method": {
+                "type": "string",
+                "description": "Optional. The HTTP method to use (GET, POST, PUT, DELETE, etc.). Defaults to GET.",
+            },
+            "headers": {
+                "type": "object",
+                "description": "Optional. A dictionary of HTTP headers to send.",
+                "additionalProperties": {"type": "string"},
+            },
+            "json_body": {
+                "type": "object",
+                "description": "Optional. A JSON serializable dictionary to send as the request body (for POST, PUT, etc.). If provided, 'Content-Type: application/json' header will be added automatically if not present.",
             },
-            "required": ["url"],
-        }
+            "data_body": {
+                "type": "string",
+                "description": "Optional. A string to send as the raw request body. Use this for non-JSON bodies.",
+            },
+            "timeout_seconds": {
+                "type": "integer",
+                "description": "Optional. Maximum time in seconds to wait for a response. Defaults to 10 seconds.",
+            },
+            "max_response_bytes": {
+                "type": "integer",
+                "description": "Optional. Maximum number of body bytes to read; longer bodies are truncated. Defaults to 2 MiB.",
+            },
+        },
+        "required": ["url"],
+    }
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """Returns the shared session, creating it on first use."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    # Idempotent requests are retried on connection errors and
+                    # on 429/5xx with a short backoff; the last response is
+                    # returned rather than raised once retries run out.
+                    # Retry-After is not waited for, since the server could
+                    # then hold the call far past timeout_seconds; the model
+                    # still sees the header on the final response.
+                    retry = Retry(
+                        total=3,
+                        backoff_factor=0.3,
+                        status_forcelist=(429, 500, 502, 503, 504),
+                        respect_retry_after_header=False,
+                        raise_on_status=False,
+                    )
+                    adapter = HTTPAdapter(
+                        pool_connections=10, pool_maxsize=_MAX_IN_FLIGHT, max_retries=retry
+                    )
+                    session = requests.Session()
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    # Calls are independent, so cookies set by one response
+                    # must not be sent with later requests.
+                    session.cookies.set_policy(
+                        http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+                    )
+                    cls._session = session
+        return cls._session
 
     def execute(
         self,
@@ -66,12 +138,22 @@ class HttpRequestTool(BaseTool):
         json_body: Optional[Dict[str, Any]] = None,
         data_body: Optional[str] = None,
         timeout_seconds: int = 10,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """
         Executes the HTTP request.
+
+        The body is streamed and read up to ``max_response_bytes``
+        ('truncated' reports whether more was available). It is decoded only
+        for textual content types; for others 'response_text' is None and
+        only 'response_size_bytes' describes the body.
+
+        Compressed responses are decompressed by urllib3 while streaming, so
+        sizes and limits apply to the decompressed body. requests advertises
+        gzip and deflate, plus br when brotli (or brotlicffi) is installed.
         """
         # trace_id is available here if needed for logging within the tool
         # This tool is not destructive in the sense of local file system changes.
@@ -87,40 +169,58 @@ class HttpRequestTool(BaseTool):
                 headers["Content-Type"] = "application/json"
 
         try:
-            response = requests.request(
-                method=effective_method,
-                url=url,
-                headers=headers,
-                json=json_body,
-                data=data_body,
-                timeout=timeout_seconds,
-            )
+            with self._in_flight:
+                with self._get_session().request(
+                    method=effective_method,
+                    url=url,
+                    headers=headers,
+                    json=json_body,
+                    data=data_body,
+                    timeout=timeout_seconds,
+                    stream=True,
+                ) as response:
+                    chunks = []
+                    total = 0
+                    truncated = False
+                    for chunk in response.iter_content(_CHUNK_SIZE):
+                        chunks.append(chunk)
+                        total += len(chunk)
+                        if total > max_response_bytes:
+                            truncated = True
+                            break
+                    raw = b"".join(chunks)[:max_response_bytes]
+                    status_code = response.status_code
+                    reason = response.reason
+                    response_headers = dict(response.headers)
+                    content_type = response.headers.get("Content-Type", "")
+                    encoding = response.encoding
+
+            response_text: Optional[str] = None
+            if _is_textual(content_type):
+                response_text = raw.decode(encoding or "utf-8", errors="replace")
 
             response_json_content: Optional[Dict[str, Any]] = None
-            content_type = response.headers.get("Content-Type", "")
-            if "application/json" in content_type:
+            if content_type.lower().startswith("application/json"):
                 try:
-                    response_json_content = response.json()
-                except json.JSONDecodeError:
+                    response_json_content = _json_loads(raw)
+                except ValueError:  # Both decoders' errors subclass it.
                     pass
 
-            if response.status_code >= 400:
+            result = {
+                "status_code": status_code,
+                "headers": response_headers,
+                "response_json": response_json_content,
+                "response_text": response_text,
+                "response_size_bytes": len(raw),
+                "truncated": truncated,
+            }
+            if status_code >= 400:
                 return {
                     "success": False,
-                    "error": f"HTTP Error: {response.status_code} - {response.reason}",
-                    "status_code": response.status_code,
-                    "headers": dict(response.headers),
-                    "response_json": response_json_content,
-                    "response_text": response.text,
+                    "error": f"HTTP Error: {status_code} - {reason}",
+                    **result,
                 }
-
-            return {
-                "success": True,
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "response_json": response_json_content,
-                "response_text": response.text,
-            }
+            return {"success": True, **result}
 
         except requests.exceptions.Timeout:
             return {"success": False, "error": "Timeout occurred", "status_code": None}
@@ -1,24 +1,91 @@
 import os
 import fnmatch
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union
-from .base_tool import BaseTool
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+from .base_tool import BaseTool, register_tool
 
 
-class ListDirectoryTool(BaseTool):
-    def get_name(self) -> str:
-        return "list_directory"
+def _is_dir(entry: os.DirEntry) -> bool:
+    """Like os.path.isdir: follows symlinks and treats errors as "not a directory"."""
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
 
-    def get_description(self) -> str:
-        return "List contents of a directory. Supports recursive listing, glob pattern filtering, and inclusion of file metadata."
+def _filter_entries(entries: List[os.DirEntry], glob_pattern: str) -> List[os.DirEntry]:
+    """Keeps the entries whose names match ``glob_pattern``, in their original order."""
+    by_name = {entry.name: entry for entry in entries}
+    return [by_name[name] for name in fnmatch.filter(by_name, glob_pattern)]
 
-    def get_parameters_schema(self) -> Dict[str, Any]:
+
+def _entry_metadata(entry: os.DirEntry, is_dir: bool) -> Dict[str, Any]:
+    """
+    Describes one listed item from its ``DirEntry``. The entry caches its
+    stat() result, including the one is_dir() may have needed for a symlink,
+    so this costs at most one stat per item.
+    """
+    item_type = "directory" if is_dir else "file"
+    try:
+        stat_info = entry.stat()
+    except OSError:  # Handle cases like permission denied for stat
         return {
-            "directory_path": "Optional. path/to/directory. Defaults to '.' (current directory).",
-            "recursive": "Optional. If true, lists directory contents recursively. Defaults to false.",
-            "glob_pattern": "Optional. A glob pattern (e.g., '*.py', 'data*') to filter items. Defaults to '*' (all items).",
-            "include_metadata": "Optional. If true, includes basic metadata (type, size, modified_at) for each item. Defaults to false.",
+            "name": entry.name,
+            "path": entry.path,
+            "type": item_type,
+            "error": "Could not retrieve metadata",
         }
+    return {
+        "name": entry.name,
+        "path": entry.path,
+        "type": item_type,
+        "size_bytes": 0 if is_dir else stat_info.st_size,
+        "modified_at": datetime.fromtimestamp(stat_info.st_mtime).isoformat(),
+    }
+
+
+def _walk_entries(
+    top: str,
+) -> Iterator[Tuple[List[os.DirEntry], List[os.DirEntry]]]:
+    """
+    os.walk over ``DirEntry`` objects, so callers get the file type and stat
+    data that scandir already fetched instead of stat-ing each path again.
+
+    Yields ``(dirs, files)`` top-down in os.walk order; like os.walk, callers
+    may prune ``dirs`` in place, symlinked directories are listed but not
+    entered, and unreadable directories are skipped.
+    """
+    stack = [top]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        dirs: List[os.DirEntry] = []
+        files: List[os.DirEntry] = []
+        for entry in entries:
+            (dirs if _is_dir(entry) else files).append(entry)
+        yield dirs, files
+        for entry in reversed(dirs):
+            if not entry.is_symlink():
+                stack.append(entry.path)
+
+
+@register_tool
+class ListDirectoryTool(BaseTool):
+    is_concurrency_safe = True
+    is_cacheable = True
+
+    NAME = "list_directory"
+    DESCRIPTION = "List contents of a directory. Supports recursive listing, glob pattern filtering, and inclusion of file metadata."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "directory_path": "Optional. path/to/directory. Defaults to '.' (current directory).",
+        "recursive": "Optional. If true, lists directory contents recursively. Defaults to false.",
+        "glob_pattern": "Optional. A glob pattern (e.g., '*.py', 'data*') to filter items. Defaults to '*' (all items).",
+        "include_metadata": "Optional. If true, includes basic metadata (type, size, modified_at) for each item. Defaults to false.",
+        "prune_dirs_by_pattern": "Optional. If true, a recursive listing only descends into directories whose names match glob_pattern. Defaults to false, so e.g. '*.py' finds matching files at any depth.",
+    }
 
     def execute(
         self,
@@ -26,6 +93,7 @@ class ListDirectoryTool(BaseTool):
         recursive: bool = False,
         glob_pattern: str = "*",
         include_metadata: bool = False,
+        prune_dirs_by_pattern: bool = False,
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
         **kwargs
@@ -34,110 +102,34 @@ class ListDirectoryTool(BaseTool):
         try:
             # This tool is not destructive.
             results: List[Union[str, Dict[str, Any]]] = []
+            # Items are described from their DirEntry (see _entry_metadata).
             if recursive:
-                for root, dirs, files in os.walk(directory_path):
+                for dirs, files in _walk_entries(directory_path):
                     # Filter directories
-                    matched_dirs = [d for d in dirs if fnmatch.fnmatch(d, glob_pattern)]
-                    for name in matched_dirs:
-                        item_path = os.path.join(root, name)
+                    matched_dirs = _filter_entries(dirs, glob_pattern)
+                    for entry in matched_dirs:
                         if include_metadata:
-                            try:
-                                stat_info = os.stat(item_path)
-                                results.append(
-                                    {
-                                        "name": name,
-                                        "path": item_path,
-                                        "type": "directory",
-                                        "size_bytes": 0,  # Or stat_info.st_size if meaningful for dirs
-                                        "modified_at": datetime.fromtimestamp(
-                                            stat_info.st_mtime
-                                        ).isoformat(),
-                                    }
-                                )
-                            except (
-                                OSError
-                            ):  # Handle cases like permission denied for stat
-                                results.append(
-                                    {
-                                        "name": name,
-                                        "path": item_path,
-                                        "type": "directory",
-                                        "error": "Could not retrieve metadata",
-                                    }
-                                )
+                            results.append(_entry_metadata(entry, True))
                         else:
-                            results.append(item_path)
-                    dirs[:] = (
-                        matched_dirs  # Prune dirs for os.walk to only visit matched ones if pattern doesn't include wildcards for path components
-                    )
+                            results.append(entry.path)
+                    if prune_dirs_by_pattern:
+                        # Only descend into directories matching the pattern
+                        dirs[:] = matched_dirs
 
                     # Filter files
-                    for name in files:
-                        if fnmatch.fnmatch(name, glob_pattern):
-                            item_path = os.path.join(root, name)
-                            if include_metadata:
-                                try:
-                                    stat_info = os.stat(item_path)
-                                    results.append(
-                                        {
-                                            "name": name,
-                                            "path": item_path,
-                                            "type": "file",
-                                            "size_bytes": stat_info.st_size,
-                                            "modified_at": datetime.fromtimestamp(
-                                                stat_info.st_mtime
-                                            ).isoformat(),
-                                        }
-                                    )
-                                except OSError:
-                                    results.append(
-                                        {
-                                            "name": name,
-                                            "path": item_path,
-                                            "type": "file",
-                                            "error": "Could not retrieve metadata",
-                                        }
-                                    )
-                            else:
-                                results.append(item_path)
-            else:
-                for item_name in os.listdir(directory_path):
-                    if fnmatch.fnmatch(item_name, glob_pattern):
-                        item_path = os.path.join(directory_path, item_name)
+                    for entry in _filter_entries(files, glob_pattern):
                         if include_metadata:
-                            try:
-                                stat_info = os.stat(item_path)
-                                is_dir = os.path.isdir(item_path)
-                                results.append(
-                                    {
-                                        "name": item_name,
-                                        "path": item_path,
-                                        "type": "directory" if is_dir else "file",
-                                        "size_bytes": (
-                                            stat_info.st_size if not is_dir else 0
-                                        ),
-                                        "modified_at": datetime.fromtimestamp(
-                                            stat_info.st_mtime
-                                        ).isoformat(),
-                                    }
-                                )
-                            except OSError:
-                                results.append(
-                                    {
-                                        "name": item_name,
-                                        "path": item_path,
-                                        "type": (
-                                            "directory"
-                                            if os.path.isdir(item_path)
-                                            else "file"
-                                        ),
-                                        "error": "Could not retrieve metadata",
-                                    }
-                                )
+                            results.append(_entry_metadata(entry, False))
                         else:
-                            results.append(
-                                item_path if recursive else item_name
-                            )  # if not recursive, just name
+                            results.append(entry.path)
+            else:
+                with os.scandir(directory_path) as it:
+                    entries = list(it)
+                for entry in _filter_entries(entries, glob_pattern):
+                    if include_metadata:
+                        results.append(_entry_metadata(entry, _is_dir(entry)))
+                    else:
+                        results.append(entry.name)  # if not recursive, just name
 
             return {"success": True, "items": results}
         except Exception as e:
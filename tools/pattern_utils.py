@@ -0,0 +1,12 @@
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str, flags: int = 0) -> "re.Pattern[str]":
+    """
+    Compiles ``pattern`` with ``flags``, sharing the result across tools and
+    calls. The agent tends to repeat queries, and unlike re's internal cache
+    this one is not churned by patterns compiled elsewhere in the process.
+    """
+    return re.compile(pattern, flags)
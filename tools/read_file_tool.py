@@ -1,21 +1,21 @@
+from itertools import islice
 from typing import Dict, Any, Optional
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
 
 
+@register_tool
 class ReadFileTool(BaseTool):
-    def get_name(self) -> str:
-        return "read_file"
+    is_concurrency_safe = True
+    is_cacheable = True
 
-    def get_description(self) -> str:
-        return "Read contents of a file. Supports specifying encoding, start line, and end line."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "file_path": "path/to/file",
-            "encoding": "Optional. The file encoding to use (e.g., 'utf-8', 'ascii'). Defaults to 'utf-8'.",
-            "start_line": "Optional. The 1-based line number to start reading from. Reads from the beginning if not specified.",
-            "end_line": "Optional. The 1-based line number to stop reading at (inclusive). Reads to the end if not specified.",
-        }
+    NAME = "read_file"
+    DESCRIPTION = "Read contents of a file. Supports specifying encoding, start line, and end line."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "file_path": "path/to/file",
+        "encoding": "Optional. The file encoding to use (e.g., 'utf-8', 'ascii'). Defaults to 'utf-8'.",
+        "start_line": "Optional. The 1-based line number to start reading from. Reads from the beginning if not specified.",
+        "end_line": "Optional. The 1-based line number to stop reading at (inclusive). Reads to the end if not specified.",
+    }
 
     def execute(
         self,
@@ -35,23 +35,17 @@ class ReadFileTool(BaseTool):
                 if start_line is None and end_line is None:
                     content = f.read()
                 else:
-                    lines = f.readlines()
                     # Adjust for 0-based indexing if start_line is provided
                     start_index = (start_line - 1) if start_line is not None else 0
+                    start_index = max(0, start_index)
                     # end_line is inclusive, so no adjustment needed for slicing if end_line is provided
                     # If end_line is None, read till the end of the file
-                    end_index = end_line if end_line is not None else len(lines)
-
-                    # Ensure indices are within bounds
-                    start_index = max(0, start_index)
-                    end_index = min(len(lines), end_index)
-
-                    if (
-                        start_index >= end_index
-                    ):  # Handles cases where start_line is beyond file length or start > end
+                    if end_line is not None and end_line <= start_index:
+                        # Handles start > end and non-positive end lines
                         content = ""
                     else:
-                        content = "".join(lines[start_index:end_index])
+                        # Only the lines up to end_line are read, not the whole file.
+                        content = "".join(islice(f, start_index, end_line))
             return {"success": True, "content": content}
         except FileNotFoundError:
             return {"success": False, "error": f"File not found: {file_path}"}
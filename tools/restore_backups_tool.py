@@ -1,18 +1,14 @@
 from typing import Dict, Any, Optional
 
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
 from backup_utils import restore_backups
 
 
+@register_tool
 class RestoreBackupsTool(BaseTool):
-    def get_name(self) -> str:
-        return "restore_backups"
-
-    def get_description(self) -> str:
-        return "Restore backups from the configured directory and extension."
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {}
+    NAME = "restore_backups"
+    DESCRIPTION = "Restore backups from the configured directory and extension."
+    PARAMS_SCHEMA: Dict[str, Any] = {}
 
     def execute(
         self,
@@ -24,9 +20,14 @@ class RestoreBackupsTool(BaseTool):
         backup_cfg = config.get("backup", {})
         backup_ext = backup_cfg.get("extension", ".bak")
         backup_dir = backup_cfg.get("directory") or "."
+        preserve_metadata = backup_cfg.get("preserve_metadata", True)
         try:
             restore_backups(
-                search_dir=backup_dir, extension=backup_ext, target_root="."
+                search_dir=backup_dir,
+                extension=backup_ext,
+                target_root=".",
+                preserve_metadata=preserve_metadata,
+                use_hardlinks=backup_cfg.get("use_hardlinks", False),
             )
             return {"success": True, "message": "Backups restored"}
         except Exception as exc:
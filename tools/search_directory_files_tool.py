@@ -1,72 +1,343 @@
 import os
 import re
+import mmap
 import fnmatch
-from typing import Dict, Any, List, Optional
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Dict, Any, List, Optional, Tuple, Union
 
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
+from .pattern_utils import compile_pattern
 
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pyahocorasick is optional; query lists fall back to str.count.
+    ahocorasick = None
 
+try:
+    import hyperscan  # type: ignore
+except ImportError:  # hyperscan is optional; every file is then scanned with re.
+    hyperscan = None
+
+# File reads release the GIL, so a thread pool overlaps the I/O of many
+# files; tiny searches stay serial.
+_DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_MIN_PARALLEL_FILES = 8
+# Files at least this large are scanned through mmap instead of being read.
+_MMAP_MIN_BYTES = 1024 * 1024
+# Files larger than this are skipped unless the caller raises the limit.
+DEFAULT_MAX_FILE_BYTES = 10 * 1024 * 1024
+# Like grep, a NUL byte in the first block marks a file as binary.
+_SNIFF_BYTES = 8192
+# Total characters of decoded text kept by _TEXT_CACHE.
+_TEXT_CACHE_MAX_CHARS = 32 * 1024 * 1024
+
+
+class _TextCache:
+    """
+    LRU of decoded file text, keyed by resolved path and valid while the
+    file's (st_mtime_ns, st_size, st_ino, st_ctime_ns) is unchanged. Agent
+    sessions search the same tree again and again with different queries;
+    unchanged files are then neither read nor decoded twice. A ``None`` text
+    records a binary file.
+
+    Callers pass ``os.path.realpath`` keys, so a relative path does not hit
+    another directory's entry after a change of working directory. The inode
+    and ctime catch a same-size rewrite or replacement within one mtime tick.
+    """
+
+    def __init__(self, max_chars: int):
+        self._max_chars = max_chars
+        self._chars = 0
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], Optional[str]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(st: os.stat_result) -> Tuple[int, ...]:
+        return (st.st_mtime_ns, st.st_size, st.st_ino, st.st_ctime_ns)
+
+    def get(self, path: str, st: os.stat_result) -> Tuple[bool, Optional[str]]:
+        """Returns ``(hit, text)`` for ``path`` as last stored for this version."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return False, None
+            if entry[0] != self._version(st):
+                self._drop(path)
+                return False, None
+            self._entries.move_to_end(path)
+            return True, entry[1]
+
+    def put(self, path: str, st: os.stat_result, text: Optional[str]) -> None:
+        size = len(text) if text else 0
+        if size > self._max_chars // 8:  # One big file should not flush the rest.
+            return
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = (self._version(st), text)
+            self._chars += size
+            while self._chars > self._max_chars:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._chars -= len(evicted) if evicted else 0
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None and entry[1]:
+            self._chars -= len(entry[1])
+
+
+_TEXT_CACHE = _TextCache(_TEXT_CACHE_MAX_CHARS)
+
+
+class _HyperscanPrefilter:
+    """
+    Rules out files without a match for a case-sensitive regex using
+    Hyperscan's SIMD matcher, leaving only likely hits for ``re`` to count.
+
+    The pattern is compiled in prefilter mode, where constructs Hyperscan does
+    not support (backreferences, some lookarounds) are widened to a superset,
+    so a miss is definite. Counting stays with ``re`` because Hyperscan
+    reports every match end rather than findall's non-overlapping matches.
+    """
+
+    _FLAGS = (
+        hyperscan.HS_FLAG_PREFILTER
+        | hyperscan.HS_FLAG_UTF8
+        | hyperscan.HS_FLAG_UCP
+        | hyperscan.HS_FLAG_SINGLEMATCH
+        if hyperscan is not None
+        else 0
+    )
+
+    def __init__(self, pattern: str):
+        self._expression = pattern.encode("utf-8")
+        # A database's scratch space cannot be shared by concurrent scans.
+        self._local = threading.local()
+        self._database()  # Raises if Hyperscan cannot compile the pattern.
+
+    @classmethod
+    def create(cls, pattern: str) -> Optional["_HyperscanPrefilter"]:
+        """Returns a prefilter for ``pattern``, or None where it cannot be trusted."""
+        # Python reads "{,n}" as a quantifier, Hyperscan as literal text.
+        if hyperscan is None or "{," in pattern:
+            return None
+        try:
+            return cls(pattern)
+        except Exception:  # Unsupported syntax, or it matches the empty string.
+            return None
+
+    def _database(self) -> Any:
+        database = getattr(self._local, "database", None)
+        if database is None:
+            database = hyperscan.Database()
+            database.compile(expressions=[self._expression], flags=[self._FLAGS])
+            self._local.database = database
+        return database
+
+    def may_match(self, content: str) -> bool:
+        found: List[bool] = []
+
+        def on_match(*_args: Any) -> None:
+            found.append(True)
+
+        self._database().scan(content.encode("utf-8"), match_event_handler=on_match)
+        return bool(found)
+
+
+def _count_bytes(f: BinaryIO, head: bytes, size: int, needle: bytes) -> int:
+    """
+    Counts non-overlapping occurrences of ``needle`` in the raw bytes of the
+    open file ``f``, of which ``head`` has already been read, without
+    decoding it.
+    """
+    if size < len(needle):
+        return 0
+    if size < _MMAP_MIN_BYTES:
+        return (head + f.read()).count(needle)
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        count = 0
+        pos = mm.find(needle)
+        while pos != -1:
+            count += 1
+            pos = mm.find(needle, pos + len(needle))
+        return count
+
+
+def _decode(data: bytes) -> str:
+    """Decodes like a text-mode read with errors="ignore", newlines included."""
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _build_automaton(patterns: Dict[str, int]) -> Optional[Any]:
+    """Builds an Aho-Corasick automaton over ``patterns`` if pyahocorasick is available."""
+    if ahocorasick is None or not all(patterns):  # It cannot index "".
+        return None
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        automaton.add_word(pattern, pattern)
+    automaton.make_automaton()
+    return automaton
+
+
+def _count_many(
+    content: str, patterns: Dict[str, int], automaton: Optional[Any]
+) -> int:
+    """
+    Returns ``sum(content.count(p) * n for p, n in patterns.items())``, where
+    ``n`` is how often the pattern was given, in a single pass over
+    ``content`` when an automaton is given.
+    """
+    if automaton is None:
+        return sum(content.count(pattern) * n for pattern, n in patterns.items())
+    # The automaton reports every occurrence, overlapping ones included, in
+    # order of their end; keep the leftmost non-overlapping ones per pattern
+    # like str.count does.
+    count = 0
+    next_start = dict.fromkeys(patterns, 0)
+    for end, pattern in automaton.iter(content):
+        start = end + 1 - len(pattern)
+        if start >= next_start[pattern]:
+            count += patterns[pattern]
+            next_start[pattern] = end + 1
+    return count
+
+
+def _count_matches(
+    file_path: str,
+    query: str,
+    compiled_pattern: Optional[re.Pattern],
+    case_sensitive: bool,
+    needle: Optional[bytes],
+    patterns: Optional[Dict[str, int]] = None,
+    automaton: Optional[Any] = None,
+    max_file_bytes: Optional[int] = DEFAULT_MAX_FILE_BYTES,
+    prefilter: Optional[_HyperscanPrefilter] = None,
+) -> int:
+    """
+    Counts the matches in one file, treating unreadable, binary and oversized
+    files as having none.
+    """
+    try:
+        st = os.stat(file_path)
+        if max_file_bytes is not None and st.st_size > max_file_bytes:
+            return 0
+        cache_key = os.path.realpath(file_path)
+        hit, content = _TEXT_CACHE.get(cache_key, st)
+        if hit and content is None:  # Known binary file
+            return 0
+        if not hit or needle is not None:
+            with open(file_path, "rb") as f:
+                head = f.read(_SNIFF_BYTES)
+                if b"\0" in head:  # Binary; skip it without decoding anything.
+                    _TEXT_CACHE.put(cache_key, st, None)
+                    return 0
+                if needle is not None:
+                    return _count_bytes(f, head, st.st_size, needle)
+                data = head + f.read()
+            # Decode as text, ignoring errors for stray non-UTF-8 bytes
+            content = _decode(data)
+            _TEXT_CACHE.put(cache_key, st, content)
+        if patterns is not None:  # Several literal strings
+            if not case_sensitive:
+                content = content.lower()
+            return _count_many(content, patterns, automaton)
+        if compiled_pattern:  # Regex search
+            if prefilter is not None and not prefilter.may_match(content):
+                return 0
+            return len(compiled_pattern.findall(content))
+        # Simple string search
+        if case_sensitive:
+            return content.count(query)
+        return content.lower().count(query.lower())
+    except OSError:
+        # Could be a directory masquerading as a file, or permission error, etc.
+        return 0
+    except Exception:
+        # Catch other potential errors during file processing (e.g. rare Unicode issues not caught by 'ignore')
+        return 0
+
+
+@register_tool
 class SearchDirectoryFilesTool(BaseTool):
     """
     Tool to recursively search for a string or regex pattern in files within a directory.
     """
 
-    def get_name(self) -> str:
-        """Returns the name of the tool."""
-        return "search_directory_files"
+    is_concurrency_safe = True
 
-    def get_description(self) -> str:
-        """Returns a description of the tool."""
-        return (
-            "Recursively search for a string or regex pattern in files within a directory. "
-            "Returns a list of files containing matches and the count of matches per file."
-        )
-
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        """Returns the schema for the tool's parameters."""
-        return {
-            "type": "object",
-            "properties": {
-                "directory_path": {
-                    "type": "string",
-                    "description": "The path to the directory to search within.",
-                },
-                "query": {
-                    "type": "string",
-                    "description": "The string or regex pattern to search for.",
-                },
-                "is_regex": {
-                    "type": "boolean",
-                    "description": "Optional. If true, the 'query' is treated as a regex pattern. Defaults to false.",
-                    "default": False,
-                },
-                "case_sensitive": {
-                    "type": "boolean",
-                    "description": "Optional. If true, the search is case-sensitive. Defaults to true.",
-                    "default": True,
-                },
-                "glob_pattern": {
-                    "type": "string",
-                    "description": "Optional. A glob pattern (e.g., '*.py', '*.txt') to filter which files are searched. Defaults to '*' (all files).",
-                    "default": "*",
-                },
-                "recursive": {
-                    "type": "boolean",
-                    "description": "Optional. If true, searches recursively into subdirectories. Defaults to true.",
-                    "default": True,
-                },
+    NAME = "search_directory_files"
+    DESCRIPTION = (
+        "Recursively search for a string or regex pattern in files within a directory. "
+        "Returns a list of files containing matches and the count of matches per file."
+    )
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "directory_path": {
+                "type": "string",
+                "description": "The path to the directory to search within.",
+            },
+            "query": {
+                "type": ["string", "array"],
+                "items": {"type": "string"},
+                "description": "The string or regex pattern to search for. A list of strings searches for all of them at once (literal search only); a file's count is the sum of their counts, so a string listed twice counts twice.",
+            },
+            "is_regex": {
+                "type": "boolean",
+                "description": "Optional. If true, the 'query' is treated as a regex pattern. Defaults to false.",
+                "default": False,
+            },
+            "case_sensitive": {
+                "type": "boolean",
+                "description": "Optional. If true, the search is case-sensitive. Defaults to true.",
+                "default": True,
+            },
+            "glob_pattern": {
+                "type": "string",
+                "description": "Optional. A glob pattern (e.g., '*.py', '*.txt') to filter which files are searched. Defaults to '*' (all files).",
+                "default": "*",
             },
-            "required": ["directory_path", "query"],
-        }
+            "recursive": {
+                "type": "boolean",
+                "description": "Optional. If true, searches recursively into subdirectories. Defaults to true.",
+                "default": True,
+            },
+            "max_file_bytes": {
+                "type": "integer",
+                "description": "Optional. Files larger than this many bytes are skipped. Defaults to 10485760 (10 MiB).",
+                "default": DEFAULT_MAX_FILE_BYTES,
+            },
+            "columnar": {
+                "type": "boolean",
+                "description": "Optional. If true, 'found_files' holds two parallel lists, file_paths and matches_counts, instead of one object per file. Defaults to false.",
+                "default": False,
+            },
+            "max_workers": {
+                "type": "integer",
+                "description": "Optional. Number of files to scan in parallel. Defaults to an automatic choice based on the CPU count.",
+            },
+        },
+        "required": ["directory_path", "query"],
+    }
 
     def execute(
         self,
         directory_path: str,
-        query: str,
+        query: Union[str, List[str]],
         is_regex: bool = False,
         case_sensitive: bool = True,
         glob_pattern: str = "*",
         recursive: bool = True,
+        max_file_bytes: Optional[int] = DEFAULT_MAX_FILE_BYTES,
+        columnar: bool = False,
+        max_workers: Optional[int] = None,
         agent_safe_mode: bool = False,  # Added for consistency, though not used by this non-destructive tool
         trace_id: Optional[str] = None,  # Added trace_id
         **kwargs: Any,  # pylint: disable=unused-argument
@@ -77,11 +348,19 @@ class SearchDirectoryFilesTool(BaseTool):
 
         Args:
             directory_path: The path to the directory to search within.
-            query: The string or regex pattern to search for.
+            query: The string or regex pattern to search for, or a list of
+                literal strings whose counts are summed per file (a string given
+                twice is counted twice).
             is_regex: If true, 'query' is a regex. Defaults to False.
             case_sensitive: If true, search is case-sensitive. Defaults to True.
             glob_pattern: Glob pattern to filter files. Defaults to "*".
             recursive: If true, searches recursively. Defaults to True.
+            max_file_bytes: Files larger than this are skipped; None searches
+                files of any size. Defaults to 10 MiB.
+            columnar: If true, return parallel file_paths/matches_counts lists
+                instead of one dict per file. Defaults to False.
+            max_workers: Number of threads scanning files. Defaults to serial
+                for fewer than 8 files and min(32, 4 * CPUs) otherwise.
             kwargs: Additional keyword arguments.
 
         Returns:
@@ -90,55 +369,92 @@ class SearchDirectoryFilesTool(BaseTool):
         if not os.path.isdir(directory_path):
             return {"success": False, "error": f"Directory not found: {directory_path}"}
 
-        found_files_info: List[Dict[str, Any]] = []
+        patterns = automaton = None
+        if isinstance(query, list):
+            if is_regex:
+                return {
+                    "success": False,
+                    "error": "A list of queries is only supported for literal search.",
+                }
+            if not query:
+                return {"success": False, "error": "The list of queries is empty."}
+            if not case_sensitive:
+                query = [q.lower() for q in query]
+            # Each distinct string is counted once and weighted by how often
+            # it was given, so duplicates still add to the sum.
+            patterns = Counter(query)
+            if len(query) == 1:
+                query, patterns = query[0], None
+            else:
+                automaton = _build_automaton(patterns)
 
         compiled_pattern = None
+        prefilter = None
         if is_regex:
             try:
                 flags = 0 if case_sensitive else re.IGNORECASE
-                compiled_pattern = re.compile(query, flags)
+                compiled_pattern = compile_pattern(query, flags)
             except re.error as e:
                 return {"success": False, "error": f"Invalid regex pattern: {str(e)}"}
+            # Hyperscan's caseless mode does not fold case like re.IGNORECASE.
+            if case_sensitive:
+                prefilter = _HyperscanPrefilter.create(query)
 
+        # UTF-8 is self-synchronising, so a case-sensitive literal can be
+        # counted on the raw bytes. Queries with line breaks still go through
+        # text mode, which translates \r\n.
+        needle = None
+        if (
+            patterns is None
+            and not is_regex
+            and case_sensitive
+            and query
+            and "\r" not in query
+            and "\n" not in query
+        ):
+            needle = query.encode("utf-8")
+
+        file_paths: List[str] = []
         for root, dirs, files_in_dir in os.walk(directory_path, topdown=True):
             if not recursive:
                 dirs[:] = []  # Don't go into subdirectories if not recursive
 
-            for filename in files_in_dir:
-                if fnmatch.fnmatch(filename, glob_pattern):
-                    file_path = os.path.join(root, filename)
-                    matches_count = 0
-                    try:
-                        # Try to open as text, ignore errors for binary files or encoding issues
-                        with open(
-                            file_path, "r", encoding="utf-8", errors="ignore"
-                        ) as f:
-                            content = f.read()
-                            if compiled_pattern:  # Regex search
-                                matches_count = len(compiled_pattern.findall(content))
-                            else:  # Simple string search
-                                if case_sensitive:
-                                    matches_count = content.count(query)
-                                else:
-                                    matches_count = content.lower().count(query.lower())
-
-                        if matches_count > 0:
-                            found_files_info.append(
-                                {"file_path": file_path, "matches_count": matches_count}
-                            )
-                    except OSError:
-                        # Could be a directory masquerading as a file, or permission error, etc.
-                        # Skip this file.
-                        pass
-                    except Exception:
-                        # Catch other potential errors during file processing (e.g. rare Unicode issues not caught by 'ignore')
-                        # Skip this file.
-                        pass
-
-            # If not recursive, and we've processed the top-level directory, we can stop.
-            # The `dirs[:] = []` handles this by preventing os.walk from yielding subdirectories.
-            # However, if directory_path itself has no subdirectories, os.walk will naturally stop.
-            # If directory_path has subdirectories, `dirs[:] = []` ensures they are not traversed.
-            # This logic is fine.
+            file_paths.extend(
+                os.path.join(root, filename)
+                for filename in fnmatch.filter(files_in_dir, glob_pattern)
+            )
+
+        count_matches = partial(
+            _count_matches,
+            query=query,
+            compiled_pattern=compiled_pattern,
+            case_sensitive=case_sensitive,
+            needle=needle,
+            patterns=patterns,
+            automaton=automaton,
+            max_file_bytes=max_file_bytes,
+            prefilter=prefilter,
+        )
+        if max_workers is None:
+            serial = len(file_paths) < _MIN_PARALLEL_FILES
+            max_workers = 1 if serial else _DEFAULT_WORKERS
+        max_workers = min(max_workers, len(file_paths))
+        if max_workers <= 1:
+            counts = map(count_matches, file_paths)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                counts = list(executor.map(count_matches, file_paths))
 
+        hits = [(path, count) for path, count in zip(file_paths, counts) if count > 0]
+        if columnar:
+            return {
+                "success": True,
+                "found_files": {
+                    "file_paths": [path for path, _ in hits],
+                    "matches_counts": [count for _, count in hits],
+                },
+            }
+        found_files_info: List[Dict[str, Any]] = [
+            {"file_path": path, "matches_count": count} for path, count in hits
+        ]
         return {"success": True, "found_files": found_files_info}
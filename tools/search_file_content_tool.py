@@ -1,23 +1,106 @@
 import re
-from typing import Dict, Any, List, Optional
+from bisect import bisect_left
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
-from .base_tool import BaseTool
+from .base_tool import BaseTool, register_tool
+from .pattern_utils import compile_pattern
 
+# Escapes that can match a newline (\s, \W, \D, \n and numeric escapes, which
+# also build ranges such as [\t-\r]) or that anchor to the whole buffer (\A, \Z).
+_NEWLINE_ESCAPES = frozenset("sWDnZAxuUNtrfva0123456789")
 
-class SearchFileContentTool(BaseTool):
-    def get_name(self) -> str:
-        return "search_file_content"
 
-    def get_description(self) -> str:
-        return "Search for a string or regex pattern within a single file. Returns a list of matching lines and their numbers."
+def _is_line_local(pattern: str) -> bool:
+    """
+    Conservatively checks that ``pattern`` can never match a newline, so running
+    it over the whole file (with re.MULTILINE) finds exactly what a per-line
+    scan would.
+    """
+    if "[^" in pattern:
+        return False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if pattern[i + 1 : i + 2] in _NEWLINE_ESCAPES:
+                return False
+            i += 2
+            continue
+        if ord(char) <= 10:  # A literal tab, newline or similar control char.
+            return False
+        if char == "(" and pattern[i + 1 : i + 2] == "?":
+            if pattern[i + 2 : i + 3] in ("", *"aiLmsux-("):  # Inline flags.
+                return False
+        i += 1
+    return True
 
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "file_path": "The path to the file to search within.",
-            "query": "The string or regex pattern to search for.",
-            "is_regex": "Optional. If true, the 'query' is treated as a regex pattern. Defaults to false.",
-            "case_sensitive": "Optional. If true, the search is case-sensitive. Defaults to true.",
-        }
+
+# One match: (line_number, line_text, match_segment, start_index, end_index).
+_Match = Tuple[int, str, str, int, int]
+MATCH_FIELDS = ("line_number", "line_text", "match_segment", "start_index", "end_index")
+
+
+def _to_columns(rows: Iterable[_Match]) -> Dict[str, Any]:
+    """
+    Packs matches column-wise. Each matched line's text is stored once in
+    ``line_texts``, keyed by the line number as a string (as JSON would).
+    """
+    line_numbers: List[int] = []
+    match_segments: List[str] = []
+    start_indices: List[int] = []
+    end_indices: List[int] = []
+    line_texts: Dict[str, str] = {}
+    for line_number, line_text, match_segment, start_index, end_index in rows:
+        line_numbers.append(line_number)
+        match_segments.append(match_segment)
+        start_indices.append(start_index)
+        end_indices.append(end_index)
+        line_texts[str(line_number)] = line_text
+    return {
+        "line_numbers": line_numbers,
+        "match_segments": match_segments,
+        "start_indices": start_indices,
+        "end_indices": end_indices,
+        "line_texts": line_texts,
+    }
+
+
+def columns_to_records(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expands ``columnar=True`` matches back into the default per-match dicts."""
+    line_texts = columns["line_texts"]
+    return [
+        dict(zip(MATCH_FIELDS, (n, line_texts[str(n)], segment, start, end)))
+        for n, segment, start, end in zip(
+            columns["line_numbers"],
+            columns["match_segments"],
+            columns["start_indices"],
+            columns["end_indices"],
+        )
+    ]
+
+
+def _newline_offsets(text: str) -> List[int]:
+    offsets = []
+    pos = text.find("\n")
+    while pos != -1:
+        offsets.append(pos)
+        pos = text.find("\n", pos + 1)
+    return offsets
+
+
+@register_tool
+class SearchFileContentTool(BaseTool):
+    is_concurrency_safe = True
+
+    NAME = "search_file_content"
+    DESCRIPTION = "Search for a string or regex pattern within a single file. Returns a list of matching lines and their numbers."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "file_path": "The path to the file to search within.",
+        "query": "The string or regex pattern to search for. Must not be empty.",
+        "is_regex": "Optional. If true, the 'query' is treated as a regex pattern. Defaults to false.",
+        "case_sensitive": "Optional. If true, the search is case-sensitive. Defaults to true.",
+        "columnar": "Optional. If true, 'matches' holds parallel lists (line_numbers, match_segments, start_indices, end_indices) plus each matched line's text once in line_texts, keyed by line number, instead of one object per match. Use it for large result sets. Defaults to false.",
+    }
 
     def execute(
         self,
@@ -25,17 +108,20 @@ class SearchFileContentTool(BaseTool):
         query: str,
         is_regex: bool = False,
         case_sensitive: bool = True,
+        columnar: bool = False,
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         # trace_id is available here if needed for logging within the tool
         # This tool is not destructive.
-        matches: List[Dict[str, Any]] = []
+        if not query:
+            # It would match at every position of every line, one record each.
+            return {"success": False, "error": "Empty query not supported"}
 
         try:
             with open(file_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+                text = f.read()
         except FileNotFoundError:
             return {"success": False, "error": f"File not found: {file_path}"}
         except Exception as e:
@@ -44,73 +130,133 @@ class SearchFileContentTool(BaseTool):
                 "error": f"Error reading file {file_path}: {str(e)}",
             }
 
-        for line_num_0_based, line_content in enumerate(lines):
-            line_text = line_content.rstrip("\n")
-            line_number = line_num_0_based + 1
+        # Compile (or lowercase) the query once, not once per line.
+        compiled_pattern = None
+        if is_regex:
+            try:
+                flags = re.IGNORECASE if not case_sensitive else 0
+                compiled_pattern = compile_pattern(query, flags)
+            except re.error as e:
+                return {
+                    "success": False,
+                    "error": f"Invalid regex pattern: {str(e)}",
+                }
+        temp_query_for_search = query if case_sensitive else query.lower()
 
-            if is_regex:
-                try:
-                    flags = re.IGNORECASE if not case_sensitive else 0
-                    compiled_pattern = re.compile(query, flags)
-                except re.error as e:
-                    return {
-                        "success": False,
-                        "error": f"Invalid regex pattern: {str(e)}",
-                    }
+        # Scan the whole buffer in one pass when that provably finds the same
+        # matches as a per-line scan; otherwise fall back to going line by line.
+        spans: Optional[Iterator[Tuple[int, int]]] = None
+        if is_regex:
+            if _is_line_local(query):
+                whole_file_pattern = compile_pattern(
+                    query, compiled_pattern.flags | re.MULTILINE
+                )
+                spans = (m.span() for m in whole_file_pattern.finditer(text))
+        elif "\n" not in query and (case_sensitive or text.isascii()):
+            # lower() keeps offsets unchanged only for ASCII text.
+            spans = self._find_all(
+                text if case_sensitive else text.lower(),
+                temp_query_for_search,
+                len(query),
+            )
 
+        if spans is None:
+            rows = self._search_lines(
+                text, query, compiled_pattern, case_sensitive, temp_query_for_search
+            )
+        else:
+            rows = self._spans_to_matches(text, spans)
+        if columnar:
+            return {"success": True, "matches": _to_columns(rows)}
+        return {
+            "success": True,
+            "matches": [dict(zip(MATCH_FIELDS, row)) for row in rows],
+        }
+
+    @staticmethod
+    def _find_all(
+        haystack: str, needle: str, query_len: int
+    ) -> Iterator[Tuple[int, int]]:
+        """Yields non-overlapping (start, end) spans of ``needle`` in ``haystack``."""
+        found_pos = haystack.find(needle)
+        while found_pos != -1:
+            yield found_pos, found_pos + query_len
+            found_pos = haystack.find(needle, found_pos + len(needle))
+
+    @staticmethod
+    def _spans_to_matches(
+        text: str, spans: Iterator[Tuple[int, int]]
+    ) -> Iterator[_Match]:
+        """Maps whole-file match offsets to line numbers and in-line indices."""
+        newlines = _newline_offsets(text)
+        # A trailing newline (or an empty file) does not start another line, so
+        # an empty match after it is not on any line.
+        last_pos = len(text) if text and not text.endswith("\n") else len(text) - 1
+        line_index = line_start = -1
+        line_text = ""
+        for start, end in spans:
+            if start > last_pos:
+                break
+            index = bisect_left(newlines, start)
+            if index != line_index:
+                line_index = index
+                line_start = newlines[index - 1] + 1 if index else 0
+                line_end = newlines[index] if index < len(newlines) else len(text)
+                line_text = text[line_start:line_end]
+            yield (
+                line_index + 1,
+                line_text,
+                text[start:end],
+                start - line_start,
+                end - line_start,
+            )
+
+    @staticmethod
+    def _search_lines(
+        text: str,
+        query: str,
+        compiled_pattern: Optional[re.Pattern],
+        case_sensitive: bool,
+        temp_query_for_search: str,
+    ) -> Iterator[_Match]:
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()  # Nothing follows the final newline (or the file is empty).
+
+        for line_num_0_based, line_text in enumerate(lines):
+            line_number = line_num_0_based + 1
+
+            if compiled_pattern is not None:
                 for match in compiled_pattern.finditer(line_text):
-                    matches.append(
-                        {
-                            "line_number": line_number,
-                            "line_text": line_text,
-                            "match_segment": match.group(0),
-                            "start_index": match.start(),
-                            "end_index": match.end(),
-                        }
+                    yield (
+                        line_number,
+                        line_text,
+                        match.group(0),
+                        match.start(),
+                        match.end(),
                     )
             else:  # Simple string search
-                if not query:  # Handle empty string query explicitly
-                    # Matches at every position from 0 to len(line_text)
-                    for i in range(len(line_text) + 1):
-                        matches.append(
-                            {
-                                "line_number": line_number,
-                                "line_text": line_text,
-                                "match_segment": "",  # query itself
-                                "start_index": i,
-                                "end_index": i,
-                            }
-                        )
-                else:
-                    # Non-empty string query
-                    temp_line_for_search = line_text
-                    temp_query_for_search = query
-                    if not case_sensitive:
-                        temp_line_for_search = line_text.lower()
-                        temp_query_for_search = query.lower()
-
-                    current_pos = 0
-                    while current_pos < len(temp_line_for_search):
-                        # If temp_query_for_search is empty, this loop is skipped due to 'if not query:' check above
-                        found_pos = temp_line_for_search.find(
-                            temp_query_for_search, current_pos
-                        )
-
-                        if found_pos == -1:
-                            break
-
-                        original_segment = line_text[found_pos : found_pos + len(query)]
-                        matches.append(
-                            {
-                                "line_number": line_number,
-                                "line_text": line_text,
-                                "match_segment": original_segment,
-                                "start_index": found_pos,
-                                "end_index": found_pos + len(query),
-                            }
-                        )
-                        current_pos = found_pos + len(
-                            temp_query_for_search
-                        )  # Advance by length of query
-
-        return {"success": True, "matches": matches}
+                temp_line_for_search = (
+                    line_text if case_sensitive else line_text.lower()
+                )
+
+                current_pos = 0
+                while current_pos < len(temp_line_for_search):
+                    found_pos = temp_line_for_search.find(
+                        temp_query_for_search, current_pos
+                    )
+
+                    if found_pos == -1:
+                        break
+
+                    original_segment = line_text[found_pos : found_pos + len(query)]
+                    yield (
+                        line_number,
+                        line_text,
+                        original_segment,
+                        found_pos,
+                        found_pos + len(query),
+                    )
+                    current_pos = found_pos + len(
+                        temp_query_for_search
+                    )  # Advance by length of query
@@ -1,32 +1,34 @@
+import codecs
 import os
-from typing import Dict, Any, Optional
-from .base_tool import BaseTool
-from backup_utils import create_backup
+from typing import Dict, Any, Optional, Union
+from .base_tool import BaseTool, Confirmer, confirm_with_input, register_tool
+from backup_utils import create_backup, detach_backup
 
+# Codecs that start a stream with a BOM; text mode omits it when appending to
+# a non-empty file, so appends with these keep going through a text stream.
+_BOM_CODECS = frozenset({"utf-16", "utf-32", "utf-8-sig"})
 
-class WriteFileTool(BaseTool):
-    def get_name(self) -> str:
-        return "write_file"
-
-    def get_description(self) -> str:
-        return "Write content to a file. Optionally, specify the file encoding."
 
-    def get_parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "file_path": "path/to/file",
-            "content": "text content",
-            "mode": "w or a",
-            "encoding": "Optional. The file encoding to use (e.g., 'utf-8', 'ascii'). Defaults to 'utf-8'.",
-        }
+@register_tool
+class WriteFileTool(BaseTool):
+    NAME = "write_file"
+    DESCRIPTION = "Write content to a file. Optionally, specify the file encoding."
+    PARAMS_SCHEMA: Dict[str, Any] = {
+        "file_path": "path/to/file",
+        "content": "text content",
+        "mode": "w or a",
+        "encoding": "Optional. The file encoding to use (e.g., 'utf-8', 'ascii'). Defaults to 'utf-8'.",
+    }
 
     def execute(
         self,
         file_path: str,
-        content: str,
+        content: Union[str, bytes, bytearray, memoryview],
         mode: str = "w",
         encoding: Optional[str] = "utf-8",
         agent_safe_mode: bool = False,
         trace_id: Optional[str] = None,
+        confirm: Optional[Confirmer] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """Write content to a file."""
@@ -35,13 +37,13 @@ class WriteFileTool(BaseTool):
         backup_cfg = config.get("backup", {})
         backup_ext = backup_cfg.get("extension", ".bak")
         backup_dir = backup_cfg.get("directory")
+        preserve_metadata = backup_cfg.get("preserve_metadata", True)
 
         try:
             if agent_safe_mode and mode == "w" and os.path.exists(file_path):
-                confirm = input(
+                if not (confirm or confirm_with_input)(
                     f"SAFE MODE: Confirm overwrite of '{file_path}'? [y/N]: "
-                )
-                if confirm.lower() not in ["y", "yes"]:
+                ):
                     return {
                         "success": False,
                         "error": "Overwrite not confirmed by user.",
@@ -50,11 +52,44 @@ class WriteFileTool(BaseTool):
             # Use a default encoding if None is provided, though the signature defaults to 'utf-8'
             effective_encoding = encoding if encoding is not None else "utf-8"
 
+            # Encode up front, so an unencodable character fails before the
+            # file is truncated, and write the bytes in one call. Bytes-like
+            # content is written as is.
+            binary_mode = mode.replace("t", "")
+            if "b" not in binary_mode:
+                binary_mode += "b"
+            data = None
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                data = content
+            elif "a" not in mode or (
+                codecs.lookup(effective_encoding).name not in _BOM_CODECS
+            ):
+                if os.linesep != "\n":  # What text mode does on write.
+                    content = content.replace("\n", os.linesep)
+                data = content.encode(effective_encoding)
+
             if os.path.exists(file_path) and "w" in mode:
-                create_backup(file_path, extension=backup_ext, backup_dir=backup_dir)
+                create_backup(
+                    file_path,
+                    extension=backup_ext,
+                    backup_dir=backup_dir,
+                    preserve_metadata=preserve_metadata,
+                )
+            else:
+                # An append would otherwise also extend a hard-linked backup.
+                detach_backup(
+                    file_path,
+                    extension=backup_ext,
+                    backup_dir=backup_dir,
+                    preserve_metadata=preserve_metadata,
+                )
 
-            with open(file_path, mode, encoding=effective_encoding) as f:
-                f.write(content)
+            if data is not None:
+                with open(file_path, binary_mode) as f:
+                    f.write(data)
+            else:
+                with open(file_path, mode, encoding=effective_encoding) as f:
+                    f.write(content)
             return {
                 "success": True,
                 "message": f"Content written to {file_path} with encoding {effective_encoding}",